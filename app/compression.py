@@ -0,0 +1,181 @@
+"""
+Response compression negotiated from Accept-Encoding.
+
+Prefers zstd when the client accepts it and the optional ``zstandard``
+package is installed, otherwise gzip. Small and already-encoded responses
+are passed through, and large bodies are compressed in a worker thread so
+the event loop keeps serving other requests.
+"""
+
+import asyncio
+import zlib
+from typing import Callable, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional dependency: pip install "code-scraping[zstd]"
+    zstandard = None
+
+from app.config import COMPRESSION_MIN_SIZE, GZIP_LEVEL, ZSTD_LEVEL
+
+# Bodies at least this large are compressed off the event loop
+THREAD_THRESHOLD = 256 * 1024
+
+COMPRESSIBLE_TYPES = ("application/json", "application/javascript", "application/xml")
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """Map each accepted coding to its q-value"""
+    codings = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding.strip().lower()] = q
+    return codings
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    """Pick the best supported coding for an Accept-Encoding header"""
+    codings = parse_accept_encoding(header)
+    candidates = ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = codings.get(coding, codings.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def _is_compressible(content_type: str) -> bool:
+    content_type = content_type.split(";")[0].strip().lower()
+    return (
+        content_type.startswith("text/")
+        or content_type in COMPRESSIBLE_TYPES
+        or content_type.endswith("+json")
+    )
+
+
+class _StreamCompressor:
+    """Incremental compressor with a common interface for gzip and zstd"""
+
+    def __init__(self, encoding: str):
+        if encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        else:
+            # wbits=31 selects the gzip container
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    compressor = _StreamCompressor(encoding)
+    return compressor.compress(data) + compressor.flush()
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with gzip or zstd"""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, send: Callable, encoding: str, minimum_size: int):
+        self._send = send
+        self._encoding = encoding
+        self._minimum_size = minimum_size
+        self._start_message: Optional[dict] = None
+        self._passthrough = False
+        self._compressor: Optional[_StreamCompressor] = None
+
+    def _headers(self) -> List[Tuple[bytes, bytes]]:
+        return list(self._start_message.get("headers", []))
+
+    def _start_with(self, headers: List[Tuple[bytes, bytes]]) -> dict:
+        return {**self._start_message, "headers": headers}
+
+    async def send(self, message: dict) -> None:
+        if message["type"] == "http.response.start":
+            self._start_message = message
+            headers = dict(self._headers())
+            if b"content-encoding" in headers or not _is_compressible(
+                headers.get(b"content-type", b"").decode("latin-1")
+            ):
+                self._passthrough = True
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._compressor is None and not more_body:
+            # Whole body in one message: compress it in one go, or skip if tiny
+            if len(body) < self._minimum_size:
+                await self._send(self._start_message)
+                await self._send(message)
+                return
+            if len(body) >= THREAD_THRESHOLD:
+                compressed = await asyncio.to_thread(compress, body, self._encoding)
+            else:
+                compressed = compress(body, self._encoding)
+            headers = [(k, v) for k, v in self._headers() if k != b"content-length"]
+            headers += [
+                (b"content-encoding", self._encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", b"Accept-Encoding"),
+            ]
+            await self._send(self._start_with(headers))
+            await self._send({"type": "http.response.body", "body": compressed})
+            return
+
+        if self._compressor is None:
+            # Streaming response: length is unknown, compress chunk by chunk
+            self._compressor = _StreamCompressor(self._encoding)
+            headers = [(k, v) for k, v in self._headers() if k != b"content-length"]
+            headers += [
+                (b"content-encoding", self._encoding.encode()),
+                (b"vary", b"Accept-Encoding"),
+            ]
+            await self._send(self._start_with(headers))
+
+        chunk = self._compressor.compress(body)
+        if not more_body:
+            chunk += self._compressor.flush()
+        if chunk or not more_body:
+            await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -0,0 +1,74 @@
+import os
+
+# Base URL of the GitHub REST API. Overridable so the service can be pointed
+# at a local fake server (see benchmarks/fake_github.py).
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+
+# Personal access token for authenticated GitHub requests (higher rate limit)
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN") or None
+
+# Seconds between event-loop lag probes
+EVENT_LOOP_LAG_INTERVAL = float(os.getenv("EVENT_LOOP_LAG_INTERVAL", "0.5"))
+
+# Trace export targets. When either is set every request is traced and
+# exported as OTLP/JSON: appended as one line per trace to the file, and/or
+# POSTed to a collector's OTLP/HTTP traces endpoint
+# (e.g. http://localhost:4318/v1/traces).
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE") or None
+OTLP_TRACES_ENDPOINT = os.getenv("OTLP_TRACES_ENDPOINT") or None
+
+# Response compression: bodies smaller than COMPRESSION_MIN_SIZE bytes are
+# sent as-is; zstd is used when accepted and the zstandard package is present
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+ZSTD_LEVEL = int(os.getenv("ZSTD_LEVEL", "3"))
+
+# Location of the SQLite database holding the HTTP cache, in-flight request
+# registry and rate-limit ledger. ":memory:" keeps it private to the process;
+# use a file path to share it between workers (see `make run-workers`).
+SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH", ":memory:")
+
+# Shared HTTP cache for upstream GET requests
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+CACHE_TTL = float(os.getenv("CACHE_TTL", "60"))
+CACHE_MAX_ENTRY_BYTES = int(os.getenv("CACHE_MAX_ENTRY_BYTES", str(2 * 1024 * 1024)))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Longest a request waits on an identical request running in another worker
+COALESCE_WAIT = float(os.getenv("COALESCE_WAIT", "10"))
+
+# Calls kept in reserve: stop calling GitHub when the shared quota drops to this
+RATE_LIMIT_RESERVE = int(os.getenv("RATE_LIMIT_RESERVE", "0"))
+
+# Retries for idempotent upstream calls failing with a transport error or 5xx
+RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", "3"))
+RETRY_BACKOFF_BASE = float(os.getenv("RETRY_BACKOFF_BASE", "0.2"))
+RETRY_BACKOFF_MAX = float(os.getenv("RETRY_BACKOFF_MAX", "5"))
+
+# Hedged raw downloads: race a second request once the first is slower than
+# this percentile of recent download latencies (0 disables hedging)
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.05"))
+
+# Per-host circuit breaker: open after this many consecutive failures and
+# retry the host after CIRCUIT_RESET_TIMEOUT seconds
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+
+# Worker processes splitting files for chunking=function (0 runs it in the event loop)
+CHUNKER_PROCESSES = int(os.getenv("CHUNKER_PROCESSES", "2"))
+
+# Columnar exports: where job files live (shared by workers) and how rows are
+# grouped; a row group is cut at whichever limit is reached first
+EXPORT_DIR = os.getenv("EXPORT_DIR", ".exports")
+EXPORT_ROW_GROUP_ROWS = int(os.getenv("EXPORT_ROW_GROUP_ROWS", "10000"))
+EXPORT_ROW_GROUP_BYTES = int(os.getenv("EXPORT_ROW_GROUP_BYTES", str(64 * 1024 * 1024)))
+# A job keeps one file per partition open; these cap its buffered content,
+# open files and rows per file (then it continues in the next part file)
+EXPORT_BUFFER_BYTES = int(os.getenv("EXPORT_BUFFER_BYTES", str(256 * 1024 * 1024)))
+EXPORT_MAX_OPEN_FILES = int(os.getenv("EXPORT_MAX_OPEN_FILES", "64"))
+EXPORT_FILE_MAX_ROWS = int(os.getenv("EXPORT_FILE_MAX_ROWS", "1000000"))
+
+# Running export jobs touch a heartbeat file this often; a job whose worker
+# missed several heartbeats (or died on this host) is reported as failed
+EXPORT_HEARTBEAT_INTERVAL = float(os.getenv("EXPORT_HEARTBEAT_INTERVAL", "10"))
@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Response
+from fastapi.responses import StreamingResponse
+
+from app.schemas.export import ExportJob, ExportRequest
+from app.services.export_service import ExportService
+
+router = APIRouter()
+
+
+@router.post("/exports", response_model=ExportJob, status_code=202)
+async def create_export(request: ExportRequest):
+    """
+    Start a columnar export of scraped snippets.
+
+    Runs every scraping request of the batch in the background and writes
+    the snippets as zstd-compressed Parquet or Arrow IPC files partitioned
+    by repository and language. Poll `GET /exports/{id}/status`, then
+    download the files from `GET /exports/{id}`.
+
+    **Parameters:**
+    - **requests**: Scraping requests (same body as `POST /scrape`), 1-100
+    - **format**: parquet (default) or arrow
+    """
+    return await ExportService.create_export(request)
+
+
+@router.get("/exports/{export_id}/status", response_model=ExportJob)
+async def get_export_status(export_id: str):
+    """Progress, written files and failures of an export job"""
+    return await ExportService.get_export(export_id)
+
+
+@router.get("/exports/{export_id}", response_class=StreamingResponse)
+async def download_export(export_id: str):
+    """
+    Stream the files of a completed export as a tar archive.
+
+    Paths inside the archive keep the Hive layout
+    (`repo=.../language=.../part-N.parquet`), so the extracted directory can
+    be read directly with `pyarrow.dataset` or any Parquet/Arrow reader.
+    Returns 409 while the export is still running.
+    """
+    job, length, chunks = await ExportService.get_archive(export_id)
+    return StreamingResponse(
+        chunks,
+        media_type="application/x-tar",
+        headers={
+            "Content-Length": str(length),
+            "Content-Disposition": f'attachment; filename="export-{job.id}.tar"',
+        },
+    )
+
+
+@router.delete("/exports/{export_id}", status_code=204)
+async def delete_export(export_id: str):
+    """Cancel an export if it is still running and delete its files"""
+    await ExportService.delete_export(export_id)
+    return Response(status_code=204)
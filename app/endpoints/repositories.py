@@ -1,6 +1,9 @@
 from fastapi import APIRouter, Query
 from typing import List, Optional
 
+from app.observability.tracing import trace_request
+from app.responses import PydanticJSONResponse
+from app.schemas.profile import RequestProfile
 from app.schemas.repository import RepositoryDiscoveryResponse
 from app.services.github_service import GitHubService
 
@@ -13,7 +16,8 @@ async def discover_repositories(
     min_forks: int = Query(default=0, ge=0, description="Minimum number of forks"),
     languages: Optional[List[str]] = Query(default=None, description="Programming languages to filter by"),
     top_k: int = Query(default=10, ge=1, le=100, description="Maximum number of repositories to return"),
-    sort: str = Query(default="stars", pattern="^(stars|forks|updated)$", description="Sort by: stars, forks, or updated")
+    sort: str = Query(default="stars", pattern="^(stars|forks|updated)$", description="Sort by: stars, forks, or updated"),
+    profile: bool = Query(default=False, description="Include a waterfall of upstream GitHub calls in the response")
 ):
     """
     Discover GitHub repositories based on specified criteria.
@@ -23,12 +27,17 @@ async def discover_repositories(
     - **languages**: List of programming languages to filter by
     - **top_k**: Maximum number of repositories to return (1-100, default: 10)
     - **sort**: Sort repositories by stars, forks, or updated date (default: stars)
+    - **profile**: When true the response includes a `profile` waterfall of upstream calls
     """
     
-    return await GitHubService.discover_repositories(
-        min_stars=min_stars,
-        min_forks=min_forks,
-        languages=languages,
-        top_k=top_k,
-        sort=sort
-    ) 
\ No newline at end of file
+    async with trace_request("discover_repositories", profile=profile, attributes={"discover.sort": sort}) as trace:
+        response = await GitHubService.discover_repositories(
+            min_stars=min_stars,
+            min_forks=min_forks,
+            languages=languages,
+            top_k=top_k,
+            sort=sort
+        )
+    if profile:
+        response.profile = RequestProfile.model_validate(trace.waterfall())
+    return PydanticJSONResponse(response) 
\ No newline at end of file
@@ -1,4 +1,8 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from app.observability.metrics import SCRAPE_DURATION
+from app.observability.tracing import trace_request
+from app.responses import PydanticJSONResponse
+from app.schemas.profile import RequestProfile
 from app.schemas.scraper import ScrapingRequest, ScrapingResponse
 from app.services.scraper_service import GitHubScraperService
 
@@ -6,7 +10,10 @@ router = APIRouter()
 
 
 @router.post("/scrape", response_model=ScrapingResponse)
-async def scrape_repository(request: ScrapingRequest):
+async def scrape_repository(
+    request: ScrapingRequest,
+    profile: bool = Query(default=False, description="Include a waterfall of upstream GitHub calls in the response"),
+):
     """
     Scrape a GitHub repository for code snippets.
     
@@ -21,10 +28,17 @@ async def scrape_repository(request: ScrapingRequest):
     - **start_year**: Optional start year for time window filtering
     - **end_year**: Optional end year for time window filtering
     - **top_k**: Maximum number of code samples to return (1-100, default: 10)
+    - **profile**: Query flag; when true the response includes a `profile` waterfall of upstream calls
     """
     
     try:
-        return await GitHubScraperService.scrape_repository(request)
+        attributes = {"scrape.mode": request.mode.value, "scrape.repo_url": str(request.repo_url)}
+        async with trace_request("scrape_repository", profile=profile, attributes=attributes) as trace:
+            with SCRAPE_DURATION.labels(mode=request.mode.value).time():
+                response = await GitHubScraperService.scrape_repository(request)
+        if profile:
+            response.profile = RequestProfile.model_validate(trace.waterfall())
+        return PydanticJSONResponse(response)
     except HTTPException:
         raise
     except Exception as e:
@@ -1,8 +1,31 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 
-from app.endpoints import repositories, health, scraper
+from app.compression import CompressionMiddleware
+from app.config import EVENT_LOOP_LAG_INTERVAL
+from app.endpoints import repositories, health, scraper, metrics, exports
+from app.observability.metrics import MetricsMiddleware, monitor_event_loop_lag
+from app.services.chunker import shutdown_chunker
+from app.services.export_service import cancel_exports
+from app.services.shared_state import close_shared_state
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background tasks tied to the application lifetime"""
+    lag_monitor = asyncio.create_task(monitor_event_loop_lag(EVENT_LOOP_LAG_INTERVAL))
+    try:
+        yield
+    finally:
+        lag_monitor.cancel()
+        await cancel_exports()
+        shutdown_chunker()
+        close_shared_state()
+
 
 # Enhanced FastAPI app configuration for better Swagger UI
 app = FastAPI(
@@ -60,6 +83,7 @@ app = FastAPI(
     openapi_url="/openapi.json",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware to fix Swagger UI "Failed to fetch" errors
@@ -70,6 +94,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Include routers with enhanced tags and descriptions
 app.include_router(
@@ -82,11 +108,21 @@ app.include_router(
     tags=["🛠️ Code Scraping"],
     prefix="",
 )
+app.include_router(
+    exports.router,
+    tags=["📦 Dataset Export"],
+    prefix="",
+)
 app.include_router(
     health.router, 
     tags=["🏥 Health & Status"],
     prefix="",
 )
+app.include_router(
+    metrics.router,
+    tags=["🏥 Health & Status"],
+    prefix="",
+)
 
 
 @app.get(
@@ -163,9 +199,13 @@ def custom_openapi():
             "name": "🛠️ Code Scraping",
             "description": "Scrape code snippets from GitHub repositories using different modes (files, commits, pull requests)"
         },
+        {
+            "name": "📦 Dataset Export",
+            "description": "Export scraped snippets in bulk as Parquet or Arrow files partitioned by repository and language"
+        },
         {
             "name": "🏥 Health & Status",
-            "description": "Health check and service status endpoints"
+            "description": "Health check, service status and Prometheus metrics endpoints"
         }
     ]
     
@@ -0,0 +1,163 @@
+"""
+Prometheus metrics for the service.
+
+All metric objects live here so they are registered exactly once; the rest of
+the code imports them (or the small helpers below) and records values.
+"""
+
+import asyncio
+import time
+
+from prometheus_client import Counter, Histogram, Gauge
+
+# Buckets tuned for GitHub round-trips (tens of ms) up to slow scrapes (minutes)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Latency of requests served by this service",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+SCRAPE_DURATION = Histogram(
+    "scrape_duration_seconds",
+    "Latency of /scrape by scraping mode",
+    ["mode"],
+    buckets=LATENCY_BUCKETS,
+)
+
+# The _count series of this histogram doubles as the upstream call counter
+GITHUB_REQUEST_DURATION = Histogram(
+    "github_request_duration_seconds",
+    "Latency of upstream GitHub calls by route template and status",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+GITHUB_RATE_LIMIT_REMAINING = Gauge(
+    "github_rate_limit_remaining",
+    "Remaining GitHub API quota as last reported by X-RateLimit-Remaining",
+    ["token", "resource"],
+    multiprocess_mode="mostrecent",
+)
+
+RATE_LIMIT_REJECTIONS = Counter(
+    "github_rate_limit_rejections_total",
+    "Upstream calls refused locally because the shared quota was exhausted",
+    ["resource"],
+)
+
+# hit / (hit + revalidated + miss) is the cache hit ratio
+CACHE_REQUESTS = Counter(
+    "github_cache_requests_total",
+    "Upstream GET lookups in the shared HTTP cache by outcome (hit, revalidated, miss, stale)",
+    ["result"],
+)
+
+COALESCED_REQUESTS = Counter(
+    "github_coalesced_requests_total",
+    "Upstream GETs answered by an identical in-flight request, in this process (local) or another worker (shared)",
+    ["scope"],
+)
+
+UPSTREAM_RETRIES = Counter(
+    "github_retries_total",
+    "Upstream calls retried after a transport error or 5xx",
+    ["route", "reason"],
+)
+
+HEDGED_REQUESTS = Counter(
+    "github_hedged_requests_total",
+    "Raw downloads that were hedged, by which attempt answered first",
+    ["winner"],
+)
+
+CIRCUIT_STATE = Gauge(
+    "github_circuit_state",
+    "Circuit breaker state per upstream host (0 closed, 1 half-open, 2 open)",
+    ["host"],
+    multiprocess_mode="max",
+)
+
+CIRCUIT_REJECTIONS = Counter(
+    "github_circuit_rejections_total",
+    "Upstream calls failed fast because the host's circuit was open",
+    ["host"],
+)
+
+CHUNKING_DURATION = Histogram(
+    "chunking_duration_seconds",
+    "Time spent splitting one response's files into function/class chunks",
+    buckets=LATENCY_BUCKETS,
+)
+
+EXPORT_JOBS = Counter(
+    "export_jobs_total",
+    "Columnar export jobs finished, by final status",
+    ["status"],
+)
+
+EXPORT_ROWS = Counter(
+    "export_rows_total",
+    "Snippets written to columnar export files, by format",
+    ["format"],
+)
+
+ITEMS_SKIPPED = Counter(
+    "scraper_items_skipped_total",
+    "Items dropped from a result because fetching or parsing them failed",
+    ["operation", "reason"],
+)
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between when a periodic probe should have woken up and when it did",
+    buckets=LAG_BUCKETS,
+)
+
+
+def record_skipped(operation: str, reason: str) -> None:
+    """Count an item skipped during scraping or discovery"""
+    ITEMS_SKIPPED.labels(operation=operation, reason=reason).inc()
+
+
+async def monitor_event_loop_lag(interval: float) -> None:
+    """Sample event-loop lag forever; run as a background task"""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - started - interval))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-endpoint latency by route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Use the matched route template, not the raw path, to bound label cardinality
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status["code"]),
+            ).observe(time.perf_counter() - started)
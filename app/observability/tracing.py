@@ -0,0 +1,312 @@
+"""
+Request-scoped tracing of upstream GitHub calls.
+
+A trace is opened around a service operation with ``trace_request``. While it
+is active, every call made through ``github_client()`` records a span (start,
+duration, status, bytes) plus child spans for the connection phases reported
+by httpcore (connect, TLS, waiting for headers, body download). The finished
+trace can be rendered as a waterfall for ``?profile=true`` responses and is
+exported as OTLP JSON when an export target is configured.
+
+When no trace is active the only cost on the request path is a single
+ContextVar lookup.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+import httpx
+
+from app.config import OTLP_TRACES_ENDPOINT, TRACE_EXPORT_FILE
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "code-scraping"
+
+# OTLP enum values
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+# httpcore trace event prefixes mapped to waterfall phase names
+_PHASES = {
+    "connection.connect_tcp": "connect",
+    "connection.connect_unix_socket": "connect",
+    "connection.start_tls": "tls",
+    "http11.send_request_headers": "send",
+    "http11.send_request_body": "send",
+    "http11.receive_response_headers": "wait",
+    "http11.receive_response_body": "download",
+    "http2.send_request_headers": "send",
+    "http2.send_request_body": "send",
+    "http2.receive_response_headers": "wait",
+    "http2.receive_response_body": "download",
+}
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+_pending_exports = set()
+_file_lock = threading.Lock()
+
+
+def _random_id(n_bytes: int) -> str:
+    return os.urandom(n_bytes).hex()
+
+
+@dataclass
+class Span:
+    """A timed operation within a trace"""
+    name: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    kind: int = SPAN_KIND_INTERNAL
+    end_ns: Optional[int] = None
+    status: int = STATUS_UNSET
+    attributes: Dict[str, object] = field(default_factory=dict)
+
+
+class Trace:
+    """Collects the spans recorded while serving one request"""
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, object]] = None):
+        self.trace_id = _random_id(16)
+        # Wall-clock anchor plus a monotonic clock for precise durations
+        self._wall_anchor = time.time_ns()
+        self._perf_anchor = time.perf_counter_ns()
+        self.root = Span(
+            name=name,
+            span_id=_random_id(8),
+            parent_id=None,
+            start_ns=self.now(),
+            kind=SPAN_KIND_SERVER,
+            attributes=dict(attributes or {}),
+        )
+        self.spans: List[Span] = [self.root]
+
+    def now(self) -> int:
+        """Current time in unix nanoseconds, derived from the monotonic clock"""
+        return self._wall_anchor + (time.perf_counter_ns() - self._perf_anchor)
+
+    def start_span(
+        self,
+        name: str,
+        parent: Optional[Span] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[Dict[str, object]] = None,
+        start_ns: Optional[int] = None,
+    ) -> Span:
+        span = Span(
+            name=name,
+            span_id=_random_id(8),
+            parent_id=(parent or self.root).span_id,
+            start_ns=start_ns if start_ns is not None else self.now(),
+            kind=kind,
+            attributes=dict(attributes or {}),
+        )
+        self.spans.append(span)
+        return span
+
+    def end_span(self, span: Span, status: int = STATUS_OK) -> None:
+        if span.end_ns is None:
+            span.end_ns = self.now()
+            span.status = status
+
+    def waterfall(self) -> dict:
+        """Render the trace with times relative to the start of the request"""
+        origin = self.root.start_ns
+        end = self.root.end_ns or self.now()
+        upstream = [s for s in self.spans if s.kind == SPAN_KIND_CLIENT]
+        return {
+            "trace_id": self.trace_id,
+            "total_ms": (end - origin) / 1e6,
+            "upstream_calls": len(upstream),
+            "upstream_bytes": sum(int(s.attributes.get("http.response.body.size", 0)) for s in upstream),
+            "spans": [
+                {
+                    "name": span.name,
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "start_ms": (span.start_ns - origin) / 1e6,
+                    "duration_ms": ((span.end_ns or end) - span.start_ns) / 1e6,
+                    "status_code": span.attributes.get("http.response.status_code"),
+                    "bytes": span.attributes.get("http.response.body.size"),
+                    "error": span.status == STATUS_ERROR,
+                    "attributes": span.attributes,
+                }
+                for span in sorted(self.spans, key=lambda s: s.start_ns)
+            ],
+        }
+
+    def to_otlp(self) -> dict:
+        """Encode the trace as an OTLP/JSON ExportTraceServiceRequest"""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [_otlp_span(self.trace_id, span, self.now()) for span in self.spans],
+                }],
+            }]
+        }
+
+
+def _otlp_value(value: object) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, object]) -> List[dict]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def _otlp_span(trace_id: str, span: Span, fallback_end_ns: int) -> dict:
+    encoded = {
+        "traceId": trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": span.kind,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns or fallback_end_ns),
+        "attributes": _otlp_attributes(span.attributes),
+        "status": {"code": span.status},
+    }
+    if span.parent_id:
+        encoded["parentSpanId"] = span.parent_id
+    return encoded
+
+
+def current_trace() -> Optional[Trace]:
+    """The trace of the request being served, or None when tracing is off"""
+    return _current_trace.get()
+
+
+def export_enabled() -> bool:
+    return bool(TRACE_EXPORT_FILE or OTLP_TRACES_ENDPOINT)
+
+
+@asynccontextmanager
+async def trace_request(
+    name: str, profile: bool = False, attributes: Optional[Dict[str, object]] = None
+) -> AsyncIterator[Optional[Trace]]:
+    """
+    Trace the enclosed operation if profiling was requested or an export
+    target is configured; otherwise yield None and record nothing.
+    """
+    if not (profile or export_enabled()):
+        yield None
+        return
+
+    trace = Trace(name, attributes)
+    token = _current_trace.set(trace)
+    status = STATUS_OK
+    try:
+        yield trace
+    except BaseException:
+        status = STATUS_ERROR
+        raise
+    finally:
+        _current_trace.reset(token)
+        trace.end_span(trace.root, status)
+        if export_enabled():
+            _schedule_export(trace)
+
+
+@contextmanager
+def traced_span(name: str, attributes: Optional[Dict[str, object]] = None) -> Iterator[Optional[Span]]:
+    """Record the enclosed block as a span of the current trace; yields None when not tracing"""
+    trace = current_trace()
+    if trace is None:
+        yield None
+        return
+    span = trace.start_span(name, attributes=attributes)
+    status = STATUS_OK
+    try:
+        yield span
+    except BaseException as e:
+        span.attributes["error.type"] = type(e).__name__
+        status = STATUS_ERROR
+        raise
+    finally:
+        trace.end_span(span, status)
+
+
+class HttpcoreTracer:
+    """Turns httpcore ``trace`` extension events into child spans of an upstream call"""
+
+    def __init__(self, trace: Trace, parent: Span):
+        self._trace = trace
+        self._parent = parent
+        self._started: Dict[str, int] = {}
+
+    async def __call__(self, event_name: str, info: dict) -> None:
+        prefix, _, stage = event_name.rpartition(".")
+        phase = _PHASES.get(prefix)
+        if phase is None:
+            return
+        if stage == "started":
+            self._started[prefix] = self._trace.now()
+        elif stage in ("complete", "failed") and prefix in self._started:
+            span = self._trace.start_span(phase, parent=self._parent, start_ns=self._started.pop(prefix))
+            self._trace.end_span(span, STATUS_OK if stage == "complete" else STATUS_ERROR)
+
+
+class TracedByteStream(httpx.AsyncByteStream):
+    """Response stream wrapper that counts body bytes and closes the span when read"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, trace: Trace, span: Span):
+        self._stream = stream
+        self._trace = trace
+        self._span = span
+        self._bytes = 0
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._bytes += len(chunk)
+            yield chunk
+
+    async def aclose(self) -> None:
+        self._span.attributes["http.response.body.size"] = self._bytes
+        status_code = self._span.attributes.get("http.response.status_code", 0)
+        self._trace.end_span(self._span, STATUS_ERROR if status_code >= 500 else STATUS_OK)
+        await self._stream.aclose()
+
+
+def _append_line(path: str, line: str) -> None:
+    with _file_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+async def _export(trace: Trace) -> None:
+    payload = trace.to_otlp()
+    try:
+        if TRACE_EXPORT_FILE:
+            await asyncio.to_thread(_append_line, TRACE_EXPORT_FILE, json.dumps(payload))
+        if OTLP_TRACES_ENDPOINT:
+            # Plain client on purpose: the export itself must not be traced or counted
+            async with httpx.AsyncClient() as client:
+                await client.post(OTLP_TRACES_ENDPOINT, json=payload, timeout=5.0)
+    except Exception as e:
+        logger.warning("Failed to export trace %s: %r", trace.trace_id, e)
+
+
+def _schedule_export(trace: Trace) -> None:
+    task = asyncio.get_running_loop().create_task(_export(trace))
+    _pending_exports.add(task)
+    task.add_done_callback(_pending_exports.discard)
@@ -0,0 +1,22 @@
+from typing import Any
+
+from fastapi import Response
+from pydantic import BaseModel
+
+
+class PydanticJSONResponse(Response):
+    """
+    JSON response rendered straight from a Pydantic model to bytes.
+
+    Returning this from an endpoint bypasses FastAPI's response_model
+    re-validation and jsonable_encoder pass; the model is serialized once by
+    pydantic-core. Keep response_model on the route so the OpenAPI schema
+    still describes the payload.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            # by_alias matches FastAPI's default response_model serialization
+            return content.__pydantic_serializer__.to_json(content, by_alias=True)
+        return super().render(content)
@@ -0,0 +1,56 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from enum import Enum
+
+from app.schemas.scraper import ScrapingRequest
+
+
+class ExportFormat(str, Enum):
+    """Columnar file format of an export"""
+    PARQUET = "parquet"
+    ARROW = "arrow"
+
+
+class ExportStatus(str, Enum):
+    """Lifecycle of an export job"""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ExportRequest(BaseModel):
+    """Request model for a columnar export job"""
+    requests: List[ScrapingRequest] = Field(
+        ..., min_length=1, max_length=100, description="Scraping requests whose snippets are exported"
+    )
+    format: ExportFormat = Field(default=ExportFormat.PARQUET, description="File format: parquet or arrow (IPC)")
+
+
+class ExportFile(BaseModel):
+    """One data file written by an export job"""
+    path: str = Field(..., description="Path inside the export, e.g. repo=owner%2Fname/language=Python/part-00000.parquet")
+    rows: int = Field(..., description="Number of snippets in the file")
+    size_bytes: int = Field(..., description="Compressed file size in bytes")
+
+
+class ExportFailure(BaseModel):
+    """A scraping request of the job that produced no rows"""
+    repo_url: str = Field(..., description="Repository URL of the failed request")
+    detail: str = Field(..., description="Why the request failed")
+
+
+class ExportJob(BaseModel):
+    """Status of an export job"""
+    id: str = Field(..., description="Export job identifier")
+    status: ExportStatus = Field(..., description="pending, running, completed or failed")
+    format: ExportFormat = Field(..., description="File format of the export")
+    created_at: str = Field(..., description="When the job was submitted")
+    finished_at: Optional[str] = Field(None, description="When the job completed or failed")
+    worker: Optional[str] = Field(None, description="host:pid of the worker process running the job")
+    requests_total: int = Field(..., description="Number of scraping requests in the job")
+    requests_done: int = Field(0, description="Number of scraping requests processed so far")
+    rows: int = Field(0, description="Number of snippets written so far")
+    files: List[ExportFile] = Field(default_factory=list, description="Data files finished so far; open files are listed once closed")
+    failures: List[ExportFailure] = Field(default_factory=list, description="Scraping requests that failed")
+    error: Optional[str] = Field(None, description="Why the job failed")
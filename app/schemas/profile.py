@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+
+class ProfileSpan(BaseModel):
+    """One bar of the upstream call waterfall"""
+    name: str = Field(..., description="Operation name, e.g. 'GET /repos/{owner}/{repo}' or a phase like 'tls'")
+    span_id: str = Field(..., description="Span identifier")
+    parent_id: Optional[str] = Field(None, description="Identifier of the enclosing span")
+    start_ms: float = Field(..., description="Start offset from the beginning of the request in milliseconds")
+    duration_ms: float = Field(..., description="Duration in milliseconds")
+    status_code: Optional[int] = Field(None, description="HTTP status of an upstream call")
+    bytes: Optional[int] = Field(None, description="Response body bytes of an upstream call")
+    error: bool = Field(False, description="Whether the operation failed")
+    attributes: Dict[str, Any] = Field(default_factory=dict, description="Span attributes")
+
+
+class RequestProfile(BaseModel):
+    """Upstream call waterfall returned when ?profile=true is set"""
+    trace_id: str = Field(..., description="Trace identifier, matches exported OTLP spans")
+    total_ms: float = Field(..., description="Total time spent in the operation in milliseconds")
+    upstream_calls: int = Field(..., description="Number of upstream GitHub calls made")
+    upstream_bytes: int = Field(..., description="Total response body bytes received from GitHub")
+    spans: List[ProfileSpan] = Field(..., description="Spans ordered by start time")
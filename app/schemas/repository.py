@@ -1,6 +1,8 @@
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List, Optional
 
+from app.schemas.profile import RequestProfile
+
 
 class RepositoryResponse(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
@@ -19,3 +21,4 @@ class RepositoryResponse(BaseModel):
 
 class RepositoryDiscoveryResponse(BaseModel):
     repositories: List[RepositoryResponse]
+    profile: Optional[RequestProfile] = Field(None, description="Upstream call waterfall (only with ?profile=true)")
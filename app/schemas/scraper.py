@@ -2,6 +2,8 @@ from pydantic import BaseModel, Field, HttpUrl
 from typing import List, Optional, Literal
 from enum import Enum
 
+from app.schemas.profile import RequestProfile
+
 
 class ScrapingMode(str, Enum):
     """Enum for different scraping modes"""
@@ -10,6 +12,12 @@ class ScrapingMode(str, Enum):
     PULL_REQUESTS = "pull_requests"
 
 
+class ChunkingStrategy(str, Enum):
+    """How file contents are split into snippets"""
+    NONE = "none"
+    FUNCTION = "function"
+
+
 class ScrapingRequest(BaseModel):
     """Request model for GitHub repo scraping"""
     repo_url: HttpUrl = Field(..., description="GitHub repository URL")
@@ -17,6 +25,10 @@ class ScrapingRequest(BaseModel):
     start_year: Optional[int] = Field(None, description="Start year for time window filter")
     end_year: Optional[int] = Field(None, description="End year for time window filter")
     top_k: int = Field(default=10, description="Maximum number of code samples to return")
+    chunking: ChunkingStrategy = Field(
+        default=ChunkingStrategy.NONE,
+        description="Split files into one snippet per function/class (files mode only)"
+    )
 
 
 class CodeSnippet(BaseModel):
@@ -37,6 +49,12 @@ class CodeSnippet(BaseModel):
     pr_number: Optional[int] = Field(None, description="Pull request number (for PR mode)")
     pr_title: Optional[str] = Field(None, description="Pull request title (for PR mode)")
 
+    # For chunked files mode (chunking=function)
+    start_line: Optional[int] = Field(None, description="First line of the chunk in the file (for chunking=function)")
+    end_line: Optional[int] = Field(None, description="Last line of the chunk in the file (for chunking=function)")
+    symbol_name: Optional[str] = Field(None, description="Function, method or class name, e.g. Class.method (for chunking=function)")
+    symbol_type: Optional[str] = Field(None, description="function, method, class, code or file (for chunking=function)")
+
 
 class RepositoryInfo(BaseModel):
     """Repository metadata"""
@@ -57,4 +75,5 @@ class ScrapingResponse(BaseModel):
     time_window: Optional[dict] = Field(None, description="Time window filter applied")
     code_snippets: List[CodeSnippet] = Field(..., description="List of scraped code snippets")
     total_found: int = Field(..., description="Total number of items found before top_k limit")
-    returned_count: int = Field(..., description="Number of items returned (limited by top_k)") 
\ No newline at end of file
+    returned_count: int = Field(..., description="Number of items returned (limited by top_k)")
+    profile: Optional[RequestProfile] = Field(None, description="Upstream call waterfall (only with ?profile=true)") 
\ No newline at end of file
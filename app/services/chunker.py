@@ -0,0 +1,518 @@
+"""
+Function/class-level chunking of source files for ``chunking=function``.
+
+Python is split with ``ast``. Other languages use lightweight heuristics:
+brace matching for C-family languages (Go, Rust, JS/TS, Java, C#, ...) and
+indentation-matched ``end`` for Ruby, Lua and MATLAB. Lines that no
+declaration covers (imports, module-level statements, class fields,
+declarations the heuristics miss) come back as ``code`` chunks, so no source
+is dropped. Files with nothing to split, or in languages without a chunker,
+come back as a single chunk.
+
+Parsing is CPU-bound, so ``chunk_snippets`` runs it in a process pool and
+keeps the event loop free. Everything executed in the pool takes and
+returns plain tuples so it pickles cheaply. If a worker dies (OOM kill,
+crash) the pool is replaced and the batch retried once; a batch that breaks
+the fresh pool too comes back as whole-file chunks.
+"""
+
+import ast
+import asyncio
+import io
+import logging
+import multiprocessing
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, NamedTuple, Optional, Pattern, Sequence, Tuple
+
+from app.config import CHUNKER_PROCESSES
+from app.observability.metrics import CHUNKING_DURATION
+from app.schemas.scraper import CodeSnippet
+
+logger = logging.getLogger(__name__)
+
+
+class Chunk(NamedTuple):
+    content: str
+    start_line: int
+    end_line: int
+    symbol_name: Optional[str]
+    symbol_type: str
+
+
+# Patterns for brace languages: (symbol type, regex whose last group is the name)
+_CLASS_LIKE = ("class", "struct", "interface", "enum", "trait", "impl", "object")
+
+_C_FUNCTION = re.compile(
+    r"^\s*(?:[\w:<>\[\],\*&~]+\s+)+\**&?([A-Za-z_~][\w:~]*)\s*\([^;]*\)\s*(?:const\s*)?(?:noexcept\s*)?(?:override\s*)?(?:\{.*)?$"
+)
+_CLASS = re.compile(
+    r"^\s*(?:(?:public|private|protected|internal|export|default|abstract|final|sealed|static|"
+    r"partial|data|open|pub(?:\([^)]*\))?)\s+)*(class|struct|interface|enum|trait|object)\s+([A-Za-z_]\w*)"
+)
+
+# Blocks whose contents are declared as if at top level: namespace X { ... },
+# TypeScript namespace/module blocks and extern "C" { ... } (string literals
+# are already blanked to "" when patterns run)
+_NAMESPACE = re.compile(
+    r'^\s*(?:(?:export|declare|inline)\s+)*(?:namespace|module)\b\s*(?:[\w.:]+|"")?\s*(?:\{\s*)?$'
+    r'|^\s*extern\s+""\s*(?:\{\s*)?$'
+)
+
+_BRACE_PATTERNS: Dict[str, List[Tuple[str, Pattern]]] = {
+    "Go": [
+        ("function", re.compile(r"^func\s+(?:\([^)]*\)\s*)?([A-Za-z_]\w*)")),
+        ("class", re.compile(r"^type\s+([A-Za-z_]\w*)\s+(?:struct|interface)\b")),
+    ],
+    "Rust": [
+        ("function", re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:const\s+)?(?:async\s+)?(?:unsafe\s+)?(?:extern\s+\"[^\"]*\"\s+)?fn\s+([A-Za-z_]\w*)")),
+        ("class", re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:struct|enum|trait|mod)\s+([A-Za-z_]\w*)")),
+        ("class", re.compile(r"^\s*impl(?:<[^>]*>)?\s+(?:[\w:<>]+\s+for\s+)?([A-Za-z_][\w:]*)")),
+    ],
+    "JavaScript": [
+        ("function", re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)")),
+        ("function", re.compile(r"^\s*(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*=>|[A-Za-z_$][\w$]*\s*=>)")),
+        ("class", re.compile(r"^\s*(?:export\s+)?(?:default\s+)?class\s+([A-Za-z_$][\w$]*)")),
+        ("function", re.compile(r"^\s+(?:static\s+)?(?:async\s+)?(?!if\b|for\b|while\b|switch\b|catch\b|return\b)([A-Za-z_$][\w$]*)\s*\([^)]*\)\s*\{")),
+    ],
+    "TypeScript": [
+        ("function", re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)")),
+        ("function", re.compile(r"^\s*(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)(?:\s*:\s*[^=]+)?\s*=\s*(?:async\s+)?(?:function\b|\([^)]*\)(?:\s*:\s*[^=]+)?\s*=>|[A-Za-z_$][\w$]*\s*=>)")),
+        ("class", re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?(?:class|interface|enum)\s+([A-Za-z_$][\w$]*)")),
+        ("function", re.compile(r"^\s+(?:(?:public|private|protected|static|readonly|async|override)\s+)*(?!if\b|for\b|while\b|switch\b|catch\b|return\b)([A-Za-z_$][\w$]*)\s*(?:<[^>]*>)?\s*\([^)]*\)\s*(?::\s*[^{]+)?\{")),
+    ],
+    "Kotlin": [
+        ("function", re.compile(r"^\s*(?:(?:public|private|protected|internal|override|open|suspend|inline|operator)\s+)*fun\s+(?:<[^>]*>\s*)?(?:[\w.]+\.)?([A-Za-z_]\w*)")),
+        ("class", _CLASS),
+    ],
+    "Swift": [
+        ("function", re.compile(r"^\s*(?:(?:public|private|fileprivate|internal|open|static|override|mutating|@\w+)\s+)*func\s+([A-Za-z_]\w*)")),
+        ("class", re.compile(r"^\s*(?:(?:public|private|fileprivate|internal|open|final)\s+)*(?:class|struct|enum|protocol|extension)\s+([A-Za-z_]\w*)")),
+    ],
+    "Scala": [
+        ("function", re.compile(r"^\s*(?:(?:private|protected|override|final|implicit)\s+)*def\s+([A-Za-z_]\w*)")),
+        ("class", _CLASS),
+    ],
+    "PHP": [
+        ("function", re.compile(r"^\s*(?:(?:public|private|protected|static|final|abstract)\s+)*function\s+&?([A-Za-z_]\w*)")),
+        ("class", _CLASS),
+    ],
+    "Shell": [
+        ("function", re.compile(r"^\s*(?:function\s+)?([A-Za-z_][\w-]*)\s*\(\)\s*\{?")),
+        ("function", re.compile(r"^\s*function\s+([A-Za-z_][\w-]*)\s*\{?")),
+    ],
+    "Perl": [
+        ("function", re.compile(r"^\s*sub\s+([A-Za-z_]\w*)")),
+    ],
+    "R": [
+        ("function", re.compile(r"^\s*([A-Za-z_.][\w.]*)\s*(?:<-|=)\s*function\s*\(")),
+    ],
+}
+# Languages sharing a grammar closely enough to share patterns
+_BRACE_PATTERNS["React"] = _BRACE_PATTERNS["JavaScript"]
+_BRACE_PATTERNS["TypeScript React"] = _BRACE_PATTERNS["TypeScript"]
+for _language in ("Java", "C#", "C", "C++", "Dart"):
+    _BRACE_PATTERNS[_language] = [("class", _CLASS), ("function", _C_FUNCTION)]
+for _language in ("C#", "C", "C++", "TypeScript", "TypeScript React", "PHP"):
+    _BRACE_PATTERNS[_language] = [("namespace", _NAMESPACE)] + _BRACE_PATTERNS[_language]
+
+_NOT_FUNCTIONS = {"if", "for", "while", "switch", "catch", "return", "sizeof", "else", "do", "new", "throw"}
+
+_INDENT_END_PATTERNS: Dict[str, List[Tuple[str, Pattern]]] = {
+    "Ruby": [
+        ("function", re.compile(r"^(\s*)def\s+(?:self\.)?([A-Za-z_]\w*[?!=]?)")),
+        ("class", re.compile(r"^(\s*)(?:class|module)\s+([A-Z]\w*(?:::\w+)*)")),
+    ],
+    "Lua": [
+        ("function", re.compile(r"^(\s*)(?:local\s+)?function\s+([A-Za-z_][\w.:]*)")),
+    ],
+    "MATLAB": [
+        ("function", re.compile(r"^(\s*)function\s+(?:\[?[\w,\s]*\]?\s*=\s*)?([A-Za-z_]\w*)")),
+    ],
+}
+
+# Ruby 3 endless methods (def area = w * h) have no closing end
+_RUBY_ENDLESS = re.compile(r"^def\s+(?:self\.)?\w+[?!]?(?:\([^)]*\)\s*|\s+)=\s")
+
+_RUST_CHAR = re.compile(r"'(?:\\.|[^\\'])'")
+
+# Comment prefixes that may sit directly above a declaration and belong to it
+_LEADING_DEFAULT = ("@", "//", "/*", "*", "#[")
+_LEADING = {
+    "Shell": ("#",), "Perl": ("#",), "R": ("#",), "PHP": _LEADING_DEFAULT + ("#",),
+    "Ruby": ("#",), "Lua": ("--",), "MATLAB": ("%",),
+}
+_HASH_COMMENTS = ("Shell", "Perl", "R", "PHP")
+_NO_C_COMMENTS = ("Shell", "Perl", "R")
+
+
+def _lines(content: str) -> List[str]:
+    """
+    Lines with their endings, split on \n, \r\n and \r only. str.splitlines
+    also breaks on form feeds and Unicode separators, which ast line numbers
+    (and editors) do not count.
+    """
+    return io.StringIO(content, newline="").readlines()
+
+
+def _whole_file(content: str) -> List[Chunk]:
+    return [Chunk(content, 1, max(1, len(_lines(content))), None, "file")]
+
+
+# Lines that carry no code of their own: blank, lone brackets/separators,
+# `end`, access specifiers or the PHP open tag
+_TRIVIAL_LINE = re.compile(r"^\s*(?:[{}()\[\];,]\s*|end\s*|(?:public|private|protected)\s*:\s*|<\?php\s*)*$")
+_PYTHON_CLASS = re.compile(r"^\s*class\s+\w+[^:]*:\s*$")
+
+
+def _is_trivial(line: str, language: str) -> bool:
+    """
+    Blank, punctuation-only and comment-only lines, and headers of blocks
+    (classes, namespaces, modules) whose members are chunked on their own
+    """
+    if _TRIVIAL_LINE.match(line):
+        return True
+    if language == "Python":
+        return line.lstrip().startswith("#") or bool(_PYTHON_CLASS.match(line))
+    if language in _BRACE_PATTERNS:
+        code = _code_only(line, False, language)[0].strip()
+        if not code or _TRIVIAL_LINE.match(code):
+            return True
+        if "}" in code or not (code.endswith("{") or "{" not in code):
+            return False
+        header = code.rstrip("{;").rstrip()
+        return any(
+            kind in ("class", "namespace") and pattern.match(header)
+            for kind, pattern in _BRACE_PATTERNS[language]
+        )
+    return any(kind == "class" and pattern.match(line) for kind, pattern in _INDENT_END_PATTERNS.get(language, []))
+
+
+def _with_remainder(lines: Sequence[str], chunks: List[Chunk], language: str) -> List[Chunk]:
+    """Add a ``code`` chunk for every run of lines no chunk covers, unless they are all trivial"""
+    covered = [False] * (len(lines) + 1)
+    for chunk in chunks:
+        for number in range(chunk.start_line, chunk.end_line + 1):
+            covered[number] = True
+    remainder = []
+    number = 1
+    while number <= len(lines):
+        if covered[number]:
+            number += 1
+            continue
+        start = number
+        while number <= len(lines) and not covered[number]:
+            number += 1
+        # Trim blank lines at both ends of the gap
+        first, last = start, number - 1
+        while first <= last and not lines[first - 1].strip():
+            first += 1
+        while last >= first and not lines[last - 1].strip():
+            last -= 1
+        if any(not _is_trivial(line, language) for line in lines[first - 1:last]):
+            remainder.append(Chunk(_slice(lines, first, last), first, last, None, "code"))
+    return sorted(chunks + remainder, key=lambda c: c.start_line)
+
+
+def _slice(lines: Sequence[str], start: int, end: int) -> str:
+    """Lines ``start``..``end`` (1-based, inclusive) joined back together"""
+    return "".join(lines[start - 1:end])
+
+
+def _leading_start(lines: Sequence[str], start: int, prefixes: Tuple[str, ...]) -> int:
+    """Extend a chunk upwards over decorators, annotations and comments directly above it"""
+    while start > 1 and lines[start - 2].strip().startswith(prefixes):
+        start -= 1
+    return start
+
+
+def chunk_python(content: str) -> List[Chunk]:
+    """Top-level functions and classes, plus methods of classes, via ast"""
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return []
+    lines = _lines(content)
+    chunks = []
+
+    def emit(node, qualified: str, symbol_type: str) -> None:
+        start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        chunks.append(Chunk(_slice(lines, start, node.end_lineno), start, node.end_lineno, qualified, symbol_type))
+
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            emit(node, node.name, "function")
+        elif isinstance(node, ast.ClassDef):
+            methods = [n for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+            if methods:
+                for method in methods:
+                    emit(method, f"{node.name}.{method.name}", "method")
+            else:
+                emit(node, node.name, "class")
+    return chunks
+
+
+def _string_end(line: str, i: int, quote: str) -> int:
+    """Index of the quote closing a literal that starts before ``i``, or -1"""
+    while i < len(line):
+        if line[i] == "\\":
+            i += 2
+        elif line[i] == quote:
+            return i
+        else:
+            i += 1
+    return -1
+
+
+def _code_only(line: str, in_comment: bool, language: str) -> Tuple[str, bool]:
+    """
+    Blank out string literals and drop comments so braces inside them are not
+    counted. Literals become ``""`` to keep token boundaries. Returns the code
+    and whether a block comment is still open at the end of the line.
+    """
+    line_comments = ("#",) if language in _NO_C_COMMENTS else ("//", "#") if language in _HASH_COMMENTS else ("//",)
+    block_comments = language not in _NO_C_COMMENTS
+    code = []
+    i = 0
+    while i < len(line):
+        if in_comment:
+            end = line.find("*/", i)
+            if end == -1:
+                return "".join(code), True
+            i = end + 2
+            in_comment = False
+            continue
+        if block_comments and line.startswith("/*", i):
+            in_comment = True
+            i += 2
+            continue
+        if line.startswith(line_comments, i):
+            break
+        char = line[i]
+        if char in "\"'`":
+            if char == "'" and language == "Rust":
+                # Lifetimes ('a) share the quote; only skip real char literals
+                match = _RUST_CHAR.match(line, i)
+                if match is None:
+                    code.append(char)
+                    i += 1
+                    continue
+                end = match.end() - 1
+            else:
+                end = _string_end(line, i + 1, char)
+            if end == -1:
+                break  # literal continues on the next line; ignore the rest
+            code.append('""')
+            i = end + 1
+            continue
+        code.append(char)
+        i += 1
+    return "".join(code), in_comment
+
+
+def chunk_braces(content: str, language: str) -> List[Chunk]:
+    """Functions (and members of class-like blocks) delimited by matching braces"""
+    patterns = _BRACE_PATTERNS[language]
+    leading = _LEADING.get(language, _LEADING_DEFAULT)
+    lines = _lines(content)
+    chunks: List[Chunk] = []
+
+    depth = 0
+    in_comment = False
+    # Open blocks being tracked: [symbol_type, name, start_line, depth_before, member_count]
+    stack: List[list] = []
+    pending: Optional[list] = None
+    pending_deadline = 0
+
+    for number, line in enumerate(lines, start=1):
+        code, in_comment = _code_only(line, in_comment, language)
+        top = stack[-1] if stack else None
+        container = top if top is not None and top[0] == "class" else None
+        # Only look for declarations at top level or directly inside a class-like or namespace block
+        can_declare = pending is None and (
+            (top is None and depth == 0)
+            or (top is not None and top[0] in ("class", "namespace") and depth == top[3] + 1)
+        )
+        if can_declare:
+            for symbol_type, pattern in patterns:
+                match = pattern.match(code)
+                if not match:
+                    continue
+                name = match.group(match.lastindex) if match.lastindex else None
+                if name in _NOT_FUNCTIONS:
+                    continue
+                if "{" not in code and code.rstrip().endswith(";"):
+                    break  # prototype or abstract declaration
+                if container is not None and symbol_type == "function":
+                    name = f"{container[1]}.{name}"
+                    symbol_type = "method"
+                pending = [symbol_type, name, number, depth, 0]
+                pending_deadline = number + 3
+                break
+
+        for char in code:
+            if char == "{":
+                if pending is not None:
+                    stack.append(pending)
+                    pending = None
+                depth += 1
+            elif char == "}":
+                depth = max(0, depth - 1)
+                if stack and depth == stack[-1][3]:
+                    symbol_type, name, start, _, members = stack.pop()
+                    if symbol_type == "namespace":
+                        continue  # transparent: its members were chunked on their own
+                    if stack and stack[-1][0] == "class":
+                        stack[-1][4] += 1
+                    # Class-like blocks are only emitted whole when no members were found in them
+                    if symbol_type != "class" or members == 0:
+                        start = _leading_start(lines, start, leading)
+                        chunks.append(Chunk(_slice(lines, start, number), start, number, name, symbol_type))
+
+        if pending is not None and number >= pending_deadline:
+            pending = None  # declaration never opened a body (e.g. expression-bodied)
+
+    chunks.sort(key=lambda c: c.start_line)
+    return chunks
+
+
+def chunk_indent_end(content: str, language: str) -> List[Chunk]:
+    """Blocks opened by a keyword and closed by ``end`` at the same indentation"""
+    patterns = _INDENT_END_PATTERNS[language]
+    leading = _LEADING[language]
+    lines = _lines(content)
+    chunks: List[Chunk] = []
+    # Open blocks: [symbol_type, name, start_line, indent, member_count]
+    open_blocks: List[list] = []
+
+    for number, line in enumerate(lines, start=1):
+        stripped = line.strip()
+        if stripped == "end":
+            indent = line[: len(line) - len(line.lstrip())]
+            # Blocks indented deeper than this end were never closed properly; drop them
+            while open_blocks and len(open_blocks[-1][3]) > len(indent):
+                open_blocks.pop()
+            if open_blocks and open_blocks[-1][3] == indent:
+                symbol_type, name, start, _, members = open_blocks.pop()
+                if open_blocks and open_blocks[-1][0] == "class":
+                    open_blocks[-1][4] += 1
+                if symbol_type != "class" or members == 0:
+                    start = _leading_start(lines, start, leading)
+                    chunks.append(Chunk(_slice(lines, start, number), start, number, name, symbol_type))
+            continue
+
+        for symbol_type, pattern in patterns:
+            match = pattern.match(line)
+            if not match:
+                continue
+            indent, name = match.group(1), match.group(2)
+            parents = [b for b in open_blocks if b[0] == "class"]
+            if symbol_type == "function" and parents:
+                name, symbol_type = f"{parents[-1][1]}.{name}", "method"
+            if re.search(r"\bend\s*$", stripped) or (symbol_type != "class" and _RUBY_ENDLESS.match(stripped)):
+                # One-liner (def x; end) or endless method (def x = ...)
+                if open_blocks and open_blocks[-1][0] == "class":
+                    open_blocks[-1][4] += 1
+                chunks.append(Chunk(line, number, number, name, symbol_type))
+            else:
+                open_blocks.append([symbol_type, name, number, indent, 0])
+            break
+
+    chunks.sort(key=lambda c: c.start_line)
+    return chunks
+
+
+def chunk_source(content: str, language: Optional[str]) -> List[Chunk]:
+    """Split one file; falls back to a single whole-file chunk"""
+    chunks: List[Chunk] = []
+    try:
+        if language == "Python":
+            chunks = chunk_python(content)
+        elif language in _BRACE_PATTERNS:
+            chunks = chunk_braces(content, language)
+        elif language in _INDENT_END_PATTERNS:
+            chunks = chunk_indent_end(content, language)
+    except Exception:
+        # One pathological file (ast.parse can raise MemoryError or
+        # RecursionError) must not fail the whole scrape
+        chunks = []
+    if not chunks:
+        return _whole_file(content)
+    return _with_remainder(_lines(content), chunks, language)
+
+
+def chunk_batch(files: List[Tuple[Optional[str], str]]) -> List[List[Chunk]]:
+    """Chunk several (language, content) pairs; the unit of work sent to the pool"""
+    return [chunk_source(content, language) for language, content in files]
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn, not fork: the parent has an event loop and helper threads running
+        _executor = ProcessPoolExecutor(
+            max_workers=CHUNKER_PROCESSES, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def _discard_executor(executor: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next call starts a fresh one"""
+    global _executor
+    if _executor is executor:
+        _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _chunk_in_pool(files: List[Tuple[Optional[str], str]]) -> List[List[Chunk]]:
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        executor = _get_executor()
+        try:
+            return await loop.run_in_executor(executor, chunk_batch, files)
+        except BrokenProcessPool:
+            logger.warning("Chunker pool broke (worker died), replacing it; attempt %d", attempt + 1)
+            _discard_executor(executor)
+    # The batch itself likely kills workers; return it unsplit rather than failing the scrape
+    return [_whole_file(content) for _, content in files]
+
+
+def shutdown_chunker() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def chunk_snippets(snippets: List[CodeSnippet]) -> List[CodeSnippet]:
+    """Replace whole-file snippets with one snippet per function/class chunk"""
+    if not snippets:
+        return []
+    files = [(snippet.language, snippet.content) for snippet in snippets]
+    started = time.perf_counter()
+    if CHUNKER_PROCESSES > 0:
+        results = await _chunk_in_pool(files)
+    else:
+        results = chunk_batch(files)
+    CHUNKING_DURATION.observe(time.perf_counter() - started)
+
+    chunked = []
+    for snippet, chunks in zip(snippets, results):
+        for chunk in chunks:
+            chunked.append(CodeSnippet.model_construct(
+                content=chunk.content,
+                file_path=snippet.file_path,
+                language=snippet.language,
+                size_bytes=len(chunk.content.encode("utf-8")),
+                lines_count=chunk.end_line - chunk.start_line + 1,
+                start_line=chunk.start_line,
+                end_line=chunk.end_line,
+                symbol_name=chunk.symbol_name,
+                symbol_type=chunk.symbol_type,
+            ))
+    return chunked
@@ -0,0 +1,439 @@
+"""
+Columnar export of scraped snippets for bulk consumers.
+
+An export job runs a batch of scraping requests one after another and
+writes every ``CodeSnippet`` to Parquet or Arrow IPC files with a fixed
+schema, zstd compressed, in a Hive-style layout::
+
+    <EXPORT_DIR>/<job id>/repo=<owner%2Fname>/language=<language>/part-<n>.<ext>
+
+Snippets go to one open file per partition for the whole job (see
+``PartitionWriters``), in row groups bounded by ``EXPORT_ROW_GROUP_ROWS`` and
+``EXPORT_ROW_GROUP_BYTES``; buffered rows and open files are capped, so
+memory stays bounded however many requests the job has. Job
+status lives next to the files in ``_status.json``, so any worker can report
+on or stream a job that another worker ran. The running worker touches
+``_heartbeat`` periodically; a pending or running job whose worker died or
+stopped heartbeating is reported as failed and can be deleted.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import shutil
+import socket
+import tarfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import HTTPException
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency: pip install "code-scraping[export]"
+    pa = None
+
+from app.config import (
+    EXPORT_BUFFER_BYTES, EXPORT_DIR, EXPORT_FILE_MAX_ROWS, EXPORT_HEARTBEAT_INTERVAL, EXPORT_MAX_OPEN_FILES,
+    EXPORT_ROW_GROUP_BYTES, EXPORT_ROW_GROUP_ROWS
+)
+from app.observability.metrics import EXPORT_JOBS, EXPORT_ROWS
+from app.schemas.export import (
+    ExportFailure, ExportFile, ExportFormat, ExportJob, ExportRequest, ExportStatus
+)
+from app.schemas.scraper import CodeSnippet, ScrapingResponse
+from app.services.scraper_service import GitHubScraperService
+
+logger = logging.getLogger(__name__)
+
+STATUS_FILE = "_status.json"
+HEARTBEAT_FILE = "_heartbeat"
+# Missed heartbeats after which a job is considered abandoned
+_STALE_HEARTBEATS = 6
+_HOSTNAME = socket.gethostname()
+# Hive's name for a partition whose value is null
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+_READ_CHUNK = 1024 * 1024
+
+# Columns stored in every file; repo and language are partition keys and
+# live in the directory names. Append new columns at the end only.
+SNIPPET_FIELDS: List[Tuple[str, str]] = [
+    ("mode", "string"),
+    ("file_path", "string"),
+    ("content", "string"),
+    ("size_bytes", "int64"),
+    ("lines_count", "int64"),
+    ("commit_sha", "string"),
+    ("commit_message", "string"),
+    ("commit_date", "string"),
+    ("author", "string"),
+    ("pr_number", "int64"),
+    ("pr_title", "string"),
+    ("start_line", "int64"),
+    ("end_line", "int64"),
+    ("symbol_name", "string"),
+    ("symbol_type", "string"),
+    ("scraped_at", "timestamp[us, tz=UTC]"),
+]
+
+_EXTENSIONS = {ExportFormat.PARQUET: "parquet", ExportFormat.ARROW: "arrow"}
+
+
+def _arrow_schema():
+    types = {"string": pa.string(), "int64": pa.int64(), "timestamp[us, tz=UTC]": pa.timestamp("us", tz="UTC")}
+    return pa.schema([pa.field(name, types[kind]) for name, kind in SNIPPET_FIELDS])
+
+
+_SCHEMA = _arrow_schema() if pa is not None else None
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def job_dir(job_id: str) -> str:
+    return os.path.join(EXPORT_DIR, job_id)
+
+
+def partition_path(full_name: str, language: Optional[str]) -> str:
+    """Hive partition directories; values are URI-encoded as pyarrow.dataset expects"""
+    language_value = quote(language, safe="") if language else NULL_PARTITION
+    return f"repo={quote(full_name, safe='')}/language={language_value}"
+
+
+def _table(rows: List[Tuple[CodeSnippet, str, datetime]]):
+    columns = {
+        name: [getattr(snippet, name, None) for snippet, _, _ in rows]
+        for name, _ in SNIPPET_FIELDS if name not in ("mode", "scraped_at")
+    }
+    columns["mode"] = [mode for _, mode, _ in rows]
+    columns["scraped_at"] = [scraped_at for _, _, scraped_at in rows]
+    return pa.Table.from_pydict(columns, schema=_SCHEMA)
+
+
+class _Partition:
+    """Open file of one repo/language partition and the rows not yet written to it"""
+
+    def __init__(self, relative: str):
+        self.relative = relative
+        self.writer = None
+        self.rows: List[Tuple[CodeSnippet, str, datetime]] = []
+        self.buffered_bytes = 0
+        self.rows_written = 0
+
+
+class PartitionWriters:
+    """
+    Keeps one open file per repo/language partition for the whole job, so
+    snippets from every request of a repository land in the same file in
+    full-size row groups. Rows are buffered per partition and written as a
+    row group once ``EXPORT_ROW_GROUP_ROWS`` or ``EXPORT_ROW_GROUP_BYTES`` is
+    reached. Memory and file handles stay bounded: when all buffers together
+    exceed ``EXPORT_BUFFER_BYTES`` the largest one is flushed early, when more
+    than ``EXPORT_MAX_OPEN_FILES`` files are open the least recently used is
+    closed, and a file is closed after ``EXPORT_FILE_MAX_ROWS`` rows. Writes
+    to a closed partition continue in its next ``part-<n>`` file.
+
+    Called from worker threads, one at a time.
+    """
+
+    def __init__(self, root: str, fmt: ExportFormat):
+        self.root = root
+        self.fmt = fmt
+        self.closed_files: List[ExportFile] = []
+        self._open: "OrderedDict[str, _Partition]" = OrderedDict()
+        self._next_part: Dict[str, int] = {}
+        self._buffered_bytes = 0
+        # A cancelled job closes its files while a write may still be running in a thread
+        self._lock = threading.Lock()
+
+    def add(self, response: ScrapingResponse) -> int:
+        """Buffer one scrape result, writing the row groups that filled up; returns the row count"""
+        scraped_at = datetime.now(timezone.utc)
+        mode = response.mode.value
+        with self._lock:
+            for snippet in response.code_snippets:
+                directory = partition_path(response.repository.full_name, snippet.language)
+                partition = self._partition(directory)
+                partition.rows.append((snippet, mode, scraped_at))
+                partition.buffered_bytes += snippet.size_bytes
+                self._buffered_bytes += snippet.size_bytes
+                if len(partition.rows) >= EXPORT_ROW_GROUP_ROWS or partition.buffered_bytes >= EXPORT_ROW_GROUP_BYTES:
+                    self._flush(directory)
+            while self._buffered_bytes > EXPORT_BUFFER_BYTES:
+                self._flush(max(self._open, key=lambda key: self._open[key].buffered_bytes))
+        return len(response.code_snippets)
+
+    def close_all(self) -> None:
+        """Write the remaining rows and close every file"""
+        with self._lock:
+            for directory in list(self._open):
+                self._close(directory)
+
+    def _partition(self, directory: str) -> _Partition:
+        partition = self._open.get(directory)
+        if partition is not None:
+            self._open.move_to_end(directory)
+            return partition
+        if len(self._open) >= EXPORT_MAX_OPEN_FILES:
+            self._close(next(iter(self._open)))
+        part = self._next_part.get(directory, 0)
+        self._next_part[directory] = part + 1
+        partition = self._open[directory] = _Partition(f"{directory}/part-{part:05d}.{_EXTENSIONS[self.fmt]}")
+        return partition
+
+    def _flush(self, directory: str) -> None:
+        partition = self._open[directory]
+        if not partition.rows:
+            return
+        if partition.writer is None:
+            path = os.path.join(self.root, partition.relative)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if self.fmt == ExportFormat.PARQUET:
+                partition.writer = pq.ParquetWriter(path, _SCHEMA, compression="zstd")
+            else:
+                partition.writer = pa.ipc.new_file(path, _SCHEMA, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+        table = _table(partition.rows)
+        if self.fmt == ExportFormat.PARQUET:
+            partition.writer.write_table(table, row_group_size=len(partition.rows))
+        else:
+            partition.writer.write_table(table)
+        partition.rows_written += len(partition.rows)
+        self._buffered_bytes -= partition.buffered_bytes
+        partition.rows, partition.buffered_bytes = [], 0
+        if partition.rows_written >= EXPORT_FILE_MAX_ROWS:
+            self._close(directory)
+
+    def _close(self, directory: str) -> None:
+        partition = self._open[directory]
+        self._flush(directory)
+        if directory not in self._open:  # the flush rolled the file over
+            return
+        del self._open[directory]
+        if partition.writer is None:
+            return
+        partition.writer.close()
+        size = os.path.getsize(os.path.join(self.root, partition.relative))
+        self.closed_files.append(ExportFile(path=partition.relative, rows=partition.rows_written, size_bytes=size))
+
+
+def _save_status(job: ExportJob) -> None:
+    root = job_dir(job.id)
+    os.makedirs(root, exist_ok=True)
+    temporary = os.path.join(root, f"{STATUS_FILE}.{os.getpid()}.tmp")
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(job.model_dump_json())
+    # Atomic so workers polling the status never read a half-written file
+    os.replace(temporary, os.path.join(root, STATUS_FILE))
+
+
+def _load_status(job_id: str) -> Optional[ExportJob]:
+    if not _JOB_ID.match(job_id):
+        return None
+    try:
+        with open(os.path.join(job_dir(job_id), STATUS_FILE), encoding="utf-8") as f:
+            return ExportJob.model_validate_json(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def _touch_heartbeat(job_id: str) -> None:
+    path = os.path.join(job_dir(job_id), HEARTBEAT_FILE)
+    with open(path, "a"):
+        pass
+    os.utime(path, None)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _is_abandoned(job: ExportJob) -> bool:
+    """A pending/running job whose worker is gone: dead on this host, or silent for too long"""
+    if job.status not in (ExportStatus.PENDING, ExportStatus.RUNNING) or job.id in _tasks:
+        return False
+    host, _, pid = (job.worker or "").rpartition(":")
+    if host == _HOSTNAME and pid.isdigit() and not _pid_alive(int(pid)):
+        return True
+    try:
+        last_beat = os.path.getmtime(os.path.join(job_dir(job.id), HEARTBEAT_FILE))
+    except FileNotFoundError:
+        return True
+    return time.time() - last_beat > _STALE_HEARTBEATS * EXPORT_HEARTBEAT_INTERVAL
+
+
+def tar_stream(job: ExportJob) -> Tuple[int, Iterator[bytes]]:
+    """
+    Content length and chunks of an uncompressed tar of the job's data files.
+    Files are already compressed, so the archive is built on the fly without
+    copying them.
+    """
+    root = job_dir(job.id)
+    members = []
+    for exported in job.files:
+        info = tarfile.TarInfo(exported.path)
+        info.size = exported.size_bytes
+        info.mode = 0o644
+        info.mtime = int(os.path.getmtime(os.path.join(root, exported.path)))
+        members.append((exported.path, info, info.tobuf(format=tarfile.PAX_FORMAT)))
+
+    def padding(size: int) -> int:
+        return -size % tarfile.BLOCKSIZE
+
+    length = sum(len(header) + info.size + padding(info.size) for _, info, header in members)
+    length += 2 * tarfile.BLOCKSIZE
+
+    def chunks() -> Iterator[bytes]:
+        for path, info, header in members:
+            yield header
+            with open(os.path.join(root, path), "rb") as f:
+                while True:
+                    chunk = f.read(_READ_CHUNK)
+                    if not chunk:
+                        break
+                    yield chunk
+            if padding(info.size):
+                yield b"\0" * padding(info.size)
+        yield b"\0" * (2 * tarfile.BLOCKSIZE)
+
+    return length, chunks()
+
+
+# Jobs running in this process
+_tasks: Dict[str, "asyncio.Task[None]"] = {}
+
+
+class ExportService:
+    """Service for columnar export jobs"""
+
+    @staticmethod
+    async def create_export(request: ExportRequest) -> ExportJob:
+        """Register an export job and start it in the background"""
+        if pa is None:
+            raise HTTPException(
+                status_code=501,
+                detail='Columnar export requires pyarrow: pip install "code-scraping[export]"'
+            )
+        job = ExportJob(
+            id=uuid.uuid4().hex,
+            status=ExportStatus.PENDING,
+            format=request.format,
+            created_at=_now(),
+            requests_total=len(request.requests),
+            worker=f"{_HOSTNAME}:{os.getpid()}",
+        )
+        await asyncio.to_thread(_save_status, job)
+        await asyncio.to_thread(_touch_heartbeat, job.id)
+        _tasks[job.id] = asyncio.create_task(ExportService._run(job, request))
+        return job
+
+    @staticmethod
+    async def _run(job: ExportJob, request: ExportRequest) -> None:
+        root = job_dir(job.id)
+        job.status = ExportStatus.RUNNING
+        heartbeat = asyncio.create_task(ExportService._heartbeat(job.id))
+        writers = PartitionWriters(root, request.format)
+        try:
+            await asyncio.to_thread(_save_status, job)
+            for scrape in request.requests:
+                try:
+                    response = await GitHubScraperService.scrape_repository(scrape)
+                except Exception as e:
+                    detail = e.detail if isinstance(e, HTTPException) else repr(e)
+                    logger.debug("Export %s: request for %s failed: %s", job.id, scrape.repo_url, detail)
+                    job.failures.append(ExportFailure(repo_url=str(scrape.repo_url), detail=str(detail)))
+                else:
+                    rows = await asyncio.to_thread(writers.add, response)
+                    job.rows += rows
+                    EXPORT_ROWS.labels(format=request.format.value).inc(rows)
+                job.requests_done += 1
+                job.files = list(writers.closed_files)
+                await asyncio.to_thread(_save_status, job)
+            await asyncio.to_thread(writers.close_all)
+            job.files = list(writers.closed_files)
+            job.status = ExportStatus.COMPLETED
+        except asyncio.CancelledError:
+            job.status = ExportStatus.FAILED
+            job.error = "Export cancelled"
+            raise
+        except Exception as e:
+            logger.exception("Export %s failed", job.id)
+            job.status = ExportStatus.FAILED
+            job.error = repr(e)
+        finally:
+            heartbeat.cancel()
+            job.finished_at = _now()
+            EXPORT_JOBS.labels(status=job.status.value).inc()
+            _tasks.pop(job.id, None)
+            # Synchronous on purpose: this may run while the task is being cancelled
+            if os.path.isdir(root):
+                try:
+                    writers.close_all()
+                except Exception:
+                    logger.exception("Export %s: failed to close files", job.id)
+                job.files = list(writers.closed_files)
+                _save_status(job)
+
+    @staticmethod
+    async def _heartbeat(job_id: str) -> None:
+        while True:
+            await asyncio.sleep(EXPORT_HEARTBEAT_INTERVAL)
+            try:
+                await asyncio.to_thread(_touch_heartbeat, job_id)
+            except OSError as e:
+                logger.warning("Export %s: failed to write heartbeat: %r", job_id, e)
+
+    @staticmethod
+    async def get_export(job_id: str) -> ExportJob:
+        """Status of an export job run by any worker"""
+        job = await asyncio.to_thread(_load_status, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Export not found")
+        if await asyncio.to_thread(_is_abandoned, job):
+            job.status = ExportStatus.FAILED
+            job.error = f"Export worker {job.worker} stopped before the job finished"
+        return job
+
+    @staticmethod
+    async def get_archive(job_id: str) -> Tuple[ExportJob, int, Iterator[bytes]]:
+        """Completed export as a tar stream"""
+        job = await ExportService.get_export(job_id)
+        if job.status != ExportStatus.COMPLETED:
+            raise HTTPException(status_code=409, detail=f"Export is {job.status.value}")
+        length, chunks = await asyncio.to_thread(tar_stream, job)
+        return job, length, chunks
+
+    @staticmethod
+    async def delete_export(job_id: str) -> None:
+        """Cancel an export running in this worker and remove its files (also for abandoned jobs)"""
+        job = await ExportService.get_export(job_id)
+        task = _tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        elif job.status in (ExportStatus.PENDING, ExportStatus.RUNNING):
+            raise HTTPException(status_code=409, detail="Export is running in another worker")
+        await asyncio.to_thread(shutil.rmtree, job_dir(job_id), True)
+
+
+async def cancel_exports() -> None:
+    """Cancel export jobs still running in this process; called on shutdown"""
+    tasks = list(_tasks.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
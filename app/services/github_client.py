@@ -0,0 +1,322 @@
+import asyncio
+import hashlib
+import re
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from app.config import (
+    CACHE_ENABLED, CACHE_MAX_ENTRY_BYTES, CACHE_TTL, COALESCE_WAIT,
+    GITHUB_API_URL, GITHUB_TOKEN, RATE_LIMIT_RESERVE
+)
+from app.observability.metrics import (
+    CACHE_REQUESTS, COALESCED_REQUESTS, GITHUB_REQUEST_DURATION,
+    GITHUB_RATE_LIMIT_REMAINING, RATE_LIMIT_REJECTIONS
+)
+from app.observability.tracing import (
+    SPAN_KIND_CLIENT, STATUS_ERROR, HttpcoreTracer, TracedByteStream, current_trace, traced_span
+)
+from app.services.resilience import CircuitOpenError, ResilientTransport
+from app.services.shared_state import CachedResponse, SharedState, get_shared_state
+
+# API paths mapped to route templates so metric labels stay low-cardinality
+_ROUTE_TEMPLATES = [
+    (re.compile(r"^/repos/[^/]+/[^/]+$"), "/repos/{owner}/{repo}"),
+    (re.compile(r"^/repos/[^/]+/[^/]+/contents(/.*)?$"), "/repos/{owner}/{repo}/contents"),
+    (re.compile(r"^/repos/[^/]+/[^/]+/git/trees/[^/]+$"), "/repos/{owner}/{repo}/git/trees/{sha}"),
+    (re.compile(r"^/repos/[^/]+/[^/]+/commits$"), "/repos/{owner}/{repo}/commits"),
+    (re.compile(r"^/repos/[^/]+/[^/]+/commits/[^/]+$"), "/repos/{owner}/{repo}/commits/{sha}"),
+    (re.compile(r"^/repos/[^/]+/[^/]+/pulls$"), "/repos/{owner}/{repo}/pulls"),
+    (re.compile(r"^/repos/[^/]+/[^/]+/pulls/\d+/files$"), "/repos/{owner}/{repo}/pulls/{number}/files"),
+    (re.compile(r"^/search/repositories$"), "/search/repositories"),
+]
+
+
+def route_template(url: httpx.URL) -> str:
+    """Map an upstream URL to its route template ("raw" for file downloads)"""
+    raw = str(url.copy_with(query=None))
+    if not raw.startswith(GITHUB_API_URL + "/"):
+        return "raw"
+    path = raw[len(GITHUB_API_URL):]
+    for pattern, template in _ROUTE_TEMPLATES:
+        if pattern.match(path):
+            return template
+    return "other"
+
+
+def token_label(token: Optional[str] = GITHUB_TOKEN) -> str:
+    """Non-reversible identifier for a token, safe to expose as a metric label"""
+    if not token:
+        return "anonymous"
+    return "sha256:" + hashlib.sha256(token.encode()).hexdigest()[:8]
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    Transport wrapper that records latency, status and rate-limit headers of
+    upstream calls, and a span per call when the request is being traced.
+    """
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self._transport = transport or httpx.AsyncHTTPTransport()
+        self._token = token_label()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        route = route_template(request.url)
+        trace = current_trace()
+        span = None
+        if trace is not None:
+            span = trace.start_span(
+                f"{request.method} {route}",
+                kind=SPAN_KIND_CLIENT,
+                attributes={
+                    "http.request.method": request.method,
+                    "http.route": route,
+                    "url.full": str(request.url),
+                    "server.address": request.url.host,
+                },
+            )
+            request.extensions["trace"] = HttpcoreTracer(trace, span)
+
+        started = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception as e:
+            GITHUB_REQUEST_DURATION.labels(
+                method=request.method, route=route, status="error"
+            ).observe(time.perf_counter() - started)
+            if span is not None:
+                span.attributes["error.type"] = type(e).__name__
+                trace.end_span(span, STATUS_ERROR)
+            raise
+
+        GITHUB_REQUEST_DURATION.labels(
+            method=request.method, route=route, status=str(response.status_code)
+        ).observe(time.perf_counter() - started)
+
+        remaining = response.headers.get("x-ratelimit-remaining")
+        if remaining is not None and remaining.isdigit():
+            GITHUB_RATE_LIMIT_REMAINING.labels(
+                token=self._token,
+                resource=response.headers.get("x-ratelimit-resource", "core"),
+            ).set(int(remaining))
+
+        if span is not None:
+            # The span ends once the body has been read, so it covers the download too
+            span.attributes["http.response.status_code"] = response.status_code
+            response.stream = TracedByteStream(response.stream, trace, span)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def rate_limit_bucket(url: httpx.URL, token: str) -> Optional[str]:
+    """Quota bucket an API call is charged to; None for raw downloads"""
+    route = route_template(url)
+    if route == "raw":
+        return None
+    resource = "search" if route.startswith("/search/") else "core"
+    return f"{token}:{resource}"
+
+
+class RateLimitTransport(httpx.AsyncBaseTransport):
+    """
+    Charges every API call against the rate-limit budget shared by all
+    workers. Once the budget is spent, calls are answered locally with a 403
+    like GitHub's own until the window resets, instead of being sent.
+    Conditional requests answered with a 304 are free on GitHub's side, so
+    their reservation is refunded.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, state: SharedState):
+        self._transport = transport
+        self._state = state
+        self._token = token_label()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        bucket = rate_limit_bucket(request.url, self._token)
+        if bucket is None:
+            return await self._transport.handle_async_request(request)
+
+        retry_after = await self._state.reserve_quota(bucket, RATE_LIMIT_RESERVE)
+        if retry_after is not None:
+            RATE_LIMIT_REJECTIONS.labels(resource=bucket.rsplit(":", 1)[1]).inc()
+            return httpx.Response(
+                403,
+                headers={
+                    "x-ratelimit-remaining": "0",
+                    "x-ratelimit-reset": str(int(time.time() + retry_after)),
+                    "retry-after": str(max(1, int(retry_after))),
+                },
+                json={"message": "API rate limit exceeded (shared quota exhausted)"},
+                request=request,
+            )
+
+        response = await self._transport.handle_async_request(request)
+        if response.status_code == 304:
+            # Refund before syncing: _update_quota never raises the count within a window
+            await self._state.refund_quota(bucket)
+        remaining = response.headers.get("x-ratelimit-remaining")
+        reset = response.headers.get("x-ratelimit-reset")
+        if remaining is not None and reset is not None and remaining.isdigit() and reset.isdigit():
+            await self._state.update_quota(bucket, int(remaining), float(reset))
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+_HOP_BY_HOP = {"connection", "keep-alive", "transfer-encoding"}
+
+
+def cache_key(request: httpx.Request) -> str:
+    """Cache key of a GET: URL, Accept and the token it was made with"""
+    raw = "\n".join([str(request.url), request.headers.get("accept", ""), token_label()])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    """
+    Serves GET requests from the shared HTTP cache and coalesces identical
+    in-flight requests, both within this process and across workers.
+
+    Fresh entries (younger than CACHE_TTL) are returned without a call;
+    stale ones are revalidated with If-None-Match, and a 304 (which GitHub
+    does not count against the rate limit) refreshes them. While the
+    upstream host's circuit breaker is open, stale entries are served as-is.
+    When the request is traced, lookups, coalesced waits and stale serves
+    are recorded as spans so cached answers still show up in the waterfall.
+    """
+
+    # Per-process map of cache key -> result future of the request fetching it
+    _inflight: Dict[str, "asyncio.Future[CachedResponse]"] = {}
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, state: SharedState):
+        self._transport = transport
+        self._state = state
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET":
+            return await self._transport.handle_async_request(request)
+
+        key = cache_key(request)
+        route = route_template(request.url)
+        with traced_span("cache lookup", {"http.route": route}) as span:
+            cached = await self._state.get_cached(key)
+            fresh = cached is not None and time.time() - cached.stored_at < CACHE_TTL
+            if span is not None:
+                span.attributes["cache.result"] = "hit" if fresh else "expired" if cached else "miss"
+        if fresh:
+            CACHE_REQUESTS.labels(result="hit").inc()
+            return cached.to_response(request)
+
+        while True:
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            try:
+                with traced_span("coalesce wait", {"http.route": route, "coalesce.scope": "local"}):
+                    result = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The request we were waiting on was cancelled; take over
+                continue
+            COALESCED_REQUESTS.labels(scope="local").inc()
+            return result.to_response(request)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            try:
+                result = await self._fetch(request, key, cached)
+            except CircuitOpenError:
+                if cached is None:
+                    raise
+                # GitHub is failing: an old answer beats no answer
+                CACHE_REQUESTS.labels(result="stale").inc()
+                age = round(time.time() - cached.stored_at, 3)
+                with traced_span("serve stale", {"http.route": route, "cache.age_s": age}):
+                    result = cached
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody may be waiting; mark the exception as retrieved
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            self._inflight.pop(key, None)
+        return result.to_response(request)
+
+    async def _fetch(self, request: httpx.Request, key: str, stale: Optional[CachedResponse]) -> CachedResponse:
+        leader = True
+        if stale is None:
+            leader = await self._state.acquire_inflight(key, COALESCE_WAIT)
+            if not leader:
+                attributes = {"http.route": route_template(request.url), "coalesce.scope": "shared"}
+                with traced_span("coalesce wait", attributes) as span:
+                    shared = await self._state.wait_for_inflight(
+                        key, newer_than=time.time() - CACHE_TTL, timeout=COALESCE_WAIT
+                    )
+                    if span is not None:
+                        span.attributes["coalesce.result"] = "hit" if shared is not None else "timeout"
+                if shared is not None:
+                    COALESCED_REQUESTS.labels(scope="shared").inc()
+                    return shared
+
+        try:
+            if stale is not None and stale.etag:
+                request.headers["If-None-Match"] = stale.etag
+            response = await self._transport.handle_async_request(request)
+            try:
+                body = b"".join([chunk async for chunk in response.stream])
+            finally:
+                await response.stream.aclose()
+
+            now = time.time()
+            if response.status_code == 304 and stale is not None:
+                CACHE_REQUESTS.labels(result="revalidated").inc()
+                await self._state.touch_cached(key, now)
+                stale.stored_at = now
+                return stale
+
+            CACHE_REQUESTS.labels(result="miss").inc()
+            entry = CachedResponse(
+                status=response.status_code,
+                headers=[(k, v) for k, v in response.headers.multi_items() if k.lower() not in _HOP_BY_HOP],
+                body=body,
+                etag=response.headers.get("etag"),
+                stored_at=now,
+            )
+            if (
+                response.status_code == 200
+                and len(body) <= CACHE_MAX_ENTRY_BYTES
+                and "no-store" not in response.headers.get("cache-control", "")
+            ):
+                await self._state.put_cached(key, entry)
+            return entry
+        finally:
+            if stale is None and leader:
+                await self._state.release_inflight(key)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def github_client() -> httpx.AsyncClient:
+    """Create an HTTP client for GitHub calls with auth, caching, resilience, quota sharing and instrumentation"""
+    headers = {"Authorization": f"Bearer {GITHUB_TOKEN}"} if GITHUB_TOKEN else None
+    state = get_shared_state()
+    # Outermost first: cache -> retries/hedging/circuit breaker -> quota -> metrics/tracing -> network
+    transport: httpx.AsyncBaseTransport = ResilientTransport(
+        RateLimitTransport(InstrumentedTransport(), state), route_of=route_template
+    )
+    if CACHE_ENABLED:
+        transport = CachingTransport(transport, state)
+    return httpx.AsyncClient(transport=transport, headers=headers)
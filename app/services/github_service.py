@@ -2,7 +2,10 @@ import httpx
 from typing import List, Optional
 from fastapi import HTTPException
 
+from app.config import GITHUB_API_URL
+from app.observability.metrics import record_skipped
 from app.schemas.repository import RepositoryResponse, RepositoryDiscoveryResponse
+from app.services.github_client import github_client
 
 
 class GitHubService:
@@ -49,9 +52,9 @@ class GitHubService:
         }
         
         try:
-            async with httpx.AsyncClient() as client:
+            async with github_client() as client:
                 response = await client.get(
-                    "https://api.github.com/search/repositories",
+                    f"{GITHUB_API_URL}/search/repositories",
                     params=params,
                     headers={
                         "Accept": "application/vnd.github.v3+json",
@@ -92,6 +95,7 @@ class GitHubService:
                         repositories.append(repo_data)
                     except Exception as e:
                         # Skip repositories that don't match our model
+                        record_skipped("discover", type(e).__name__)
                         continue
                 
                 return RepositoryDiscoveryResponse(
@@ -0,0 +1,296 @@
+"""
+Resilience layer for upstream GitHub calls.
+
+``ResilientTransport`` wraps the rest of the transport stack with:
+
+- retries with full-jitter exponential backoff for idempotent requests that
+  failed with a transport error or a 5xx (except timed-out raw downloads,
+  which already cost the caller a full timeout). All attempts of a call
+  share one budget, the caller's timeout, so retries never stretch a call
+  beyond it; a 5xx whose Retry-After is longer than the backoff cap is
+  returned as is,
+- hedging for raw file downloads: when the first attempt is slower than a
+  recent latency percentile, a second identical request is raced against it,
+- a circuit breaker per upstream host that fails fast while the host is
+  unhealthy. ``CachingTransport`` catches ``CircuitOpenError`` and serves a
+  stale cache entry when it has one.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Deque, Dict, Optional
+
+import httpx
+
+from app.config import (
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT, HEDGE_MIN_DELAY, HEDGE_PERCENTILE,
+    RETRY_ATTEMPTS, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX
+)
+from app.observability.metrics import (
+    CIRCUIT_REJECTIONS, CIRCUIT_STATE, HEDGED_REQUESTS, UPSTREAM_RETRIES
+)
+from app.observability.tracing import current_trace
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+RETRYABLE_STATUSES = {500, 502, 503, 504}
+
+# Latency samples kept for the hedging percentile, and how many are needed first
+_HEDGE_WINDOW = 200
+_HEDGE_MIN_SAMPLES = 20
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of calling a host whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Closed: calls pass. After ``failure_threshold`` consecutive failures it
+    opens and rejects calls for ``reset_timeout`` seconds, then lets a single
+    trial call through (half-open); its outcome closes or re-opens it.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, host: str, failure_threshold: int, reset_timeout: float):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+
+    def _set_state(self, state: int) -> None:
+        self.state = state
+        CIRCUIT_STATE.labels(host=self.host).set(state)
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._set_state(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._trial_running:
+                return False
+            self._trial_running = True
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._trial_running = False
+        if self.state != self.CLOSED:
+            self._set_state(self.CLOSED)
+
+    def record_abandoned(self) -> None:
+        """The call ended without saying anything about the host (e.g. cancelled)"""
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._trial_running = False
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+
+class LatencyTracker:
+    """Rolling window of latencies with a cached percentile"""
+
+    def __init__(self, window: int = _HEDGE_WINDOW):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._cached: Optional[float] = None
+        self._since_refresh = 0
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._since_refresh += 1
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if len(self._samples) < _HEDGE_MIN_SAMPLES:
+            return None
+        # Re-sorting on every call would cost more than the precision is worth
+        if self._cached is None or self._since_refresh >= _HEDGE_MIN_SAMPLES:
+            ordered = sorted(self._samples)
+            self._cached = ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100.0))]
+            self._since_refresh = 0
+        return self._cached
+
+
+# Process-wide state: one breaker per upstream host, one latency window for raw downloads
+_breakers: Dict[str, CircuitBreaker] = {}
+_raw_latency = LatencyTracker()
+
+
+def circuit_breaker(host: str) -> CircuitBreaker:
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = _breakers[host] = CircuitBreaker(host, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+    return breaker
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Seconds asked for by a Retry-After header (delta-seconds or HTTP date)"""
+    if value is None:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff, or the server's Retry-After when it gave one"""
+    if retry_after is not None:
+        return retry_after
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * (2 ** attempt)))
+
+
+def _call_budget(request: httpx.Request) -> Optional[float]:
+    """The longest of the caller's timeouts: what a single attempt could have cost"""
+    timeouts = [t for t in (request.extensions.get("timeout") or {}).values() if t is not None]
+    return max(timeouts) if timeouts else None
+
+
+def _limit_timeouts(request: httpx.Request, remaining: float) -> None:
+    """Cap every timeout of the next attempt at what is left of the budget"""
+    timeouts = request.extensions.get("timeout") or {}
+    request.extensions["timeout"] = {
+        name: remaining if value is None else min(value, remaining) for name, value in timeouts.items()
+    }
+
+
+async def _sleep_traced(delay: float, attempt: int, reason: str) -> None:
+    trace = current_trace()
+    if trace is None:
+        await asyncio.sleep(delay)
+        return
+    span = trace.start_span("backoff", attributes={"retry.attempt": attempt, "retry.reason": reason})
+    await asyncio.sleep(delay)
+    trace.end_span(span)
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    """Retries, hedging and circuit breaking around the inner transport"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, route_of):
+        self._transport = transport
+        self._route_of = route_of
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        route = self._route_of(request.url)
+        breaker = circuit_breaker(request.url.host)
+        attempts = max(1, RETRY_ATTEMPTS) if request.method in IDEMPOTENT_METHODS else 1
+        budget = _call_budget(request)
+        deadline = None if budget is None else time.monotonic() + budget
+
+        def can_wait(delay: float) -> bool:
+            return deadline is None or time.monotonic() + delay < deadline
+
+        for attempt in range(attempts):
+            if not breaker.allow():
+                CIRCUIT_REJECTIONS.labels(host=breaker.host).inc()
+                raise CircuitOpenError(f"Circuit open for {breaker.host}", request=request)
+            if attempt and deadline is not None:
+                _limit_timeouts(request, max(0.001, deadline - time.monotonic()))
+
+            last_attempt = attempt == attempts - 1
+            try:
+                if route == "raw" and HEDGE_PERCENTILE and request.method in IDEMPOTENT_METHODS:
+                    response = await self._hedged(request)
+                else:
+                    response = await self._transport.handle_async_request(request)
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                # A timed-out download has used up its budget; retrying it
+                # would multiply the stall instead of bounding it
+                if last_attempt or (route == "raw" and isinstance(e, httpx.TimeoutException)):
+                    raise
+                delay = backoff_delay(attempt)
+                if not can_wait(delay):
+                    raise
+                reason = type(e).__name__
+                UPSTREAM_RETRIES.labels(route=route, reason=reason).inc()
+                await _sleep_traced(delay, attempt + 1, reason)
+                continue
+            except BaseException:
+                # Cancelled or failed for a reason unrelated to the host's health
+                breaker.record_abandoned()
+                raise
+
+            if response.status_code not in RETRYABLE_STATUSES:
+                breaker.record_success()
+                return response
+
+            breaker.record_failure()
+            retry_after = retry_after_seconds(response.headers.get("retry-after"))
+            # The server asked for a longer pause than we are willing to wait
+            if retry_after is not None and retry_after > RETRY_BACKOFF_MAX:
+                return response
+            delay = backoff_delay(attempt, retry_after)
+            if last_attempt or not can_wait(delay):
+                return response
+            reason = f"http_{response.status_code}"
+            UPSTREAM_RETRIES.labels(route=route, reason=reason).inc()
+            await response.aclose()
+            await _sleep_traced(delay, attempt + 1, reason)
+
+        raise AssertionError("unreachable")
+
+    async def _hedged(self, request: httpx.Request) -> httpx.Response:
+        """
+        Send the request; if it has not answered within the recent latency
+        percentile, race an identical second request and keep the first reply.
+        """
+        threshold = _raw_latency.percentile(HEDGE_PERCENTILE)
+        started = time.perf_counter()
+        if threshold is None:
+            response = await self._transport.handle_async_request(request)
+            _raw_latency.observe(time.perf_counter() - started)
+            return response
+
+        primary = asyncio.ensure_future(self._transport.handle_async_request(request))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=max(threshold, HEDGE_MIN_DELAY))
+            hedged = not done
+            if hedged:
+                # Separate request object so each attempt keeps its own extensions (tracing)
+                twin = httpx.Request(
+                    request.method, request.url, headers=request.headers, extensions=dict(request.extensions)
+                )
+                pending.add(asyncio.ensure_future(self._transport.handle_async_request(twin)))
+
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if hedged:
+                        HEDGED_REQUESTS.labels(winner="primary" if task is primary else "hedge").inc()
+                    for other in done - {task}:
+                        _close_abandoned(other)
+                    _raw_latency.observe(time.perf_counter() - started)
+                    return task.result()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+                task.add_done_callback(_close_abandoned)
+
+
+def _close_abandoned(task: "asyncio.Future[httpx.Response]") -> None:
+    """Release the connection of a hedge loser that still managed to answer"""
+    if task.cancelled() or task.exception() is not None:
+        return
+    asyncio.ensure_future(task.result().aclose())
@@ -1,4 +1,5 @@
 import httpx
+import logging
 import re
 import base64
 from typing import List, Optional, Tuple
@@ -6,10 +7,16 @@ from datetime import datetime
 from urllib.parse import urlparse
 from fastapi import HTTPException
 
+from app.config import GITHUB_API_URL
+from app.observability.metrics import record_skipped
 from app.schemas.scraper import (
     ScrapingRequest, ScrapingResponse, CodeSnippet, 
-    RepositoryInfo, ScrapingMode
+    RepositoryInfo, ScrapingMode, ChunkingStrategy
 )
+from app.services.chunker import chunk_snippets
+from app.services.github_client import github_client
+
+logger = logging.getLogger(__name__)
 
 
 class GitHubScraperService:
@@ -83,9 +90,9 @@ class GitHubScraperService:
     @staticmethod
     async def _get_repository_info(owner: str, repo: str) -> RepositoryInfo:
         """Get repository information from GitHub API"""
-        async with httpx.AsyncClient() as client:
+        async with github_client() as client:
             response = await client.get(
-                f"https://api.github.com/repos/{owner}/{repo}",
+                f"{GITHUB_API_URL}/repos/{owner}/{repo}",
                 headers={
                     "Accept": "application/vnd.github.v3+json",
                     "User-Agent": "GitHub-Repository-Scraper-Service"
@@ -120,10 +127,10 @@ class GitHubScraperService:
         """Scrape repository files"""
         snippets = []
         
-        async with httpx.AsyncClient() as client:
+        async with github_client() as client:
             # Get repository contents
             response = await client.get(
-                f"https://api.github.com/repos/{owner}/{repo}/contents",
+                f"{GITHUB_API_URL}/repos/{owner}/{repo}/contents",
                 headers={
                     "Accept": "application/vnd.github.v3+json",
                     "User-Agent": "GitHub-Repository-Scraper-Service"
@@ -157,7 +164,7 @@ class GitHubScraperService:
                             if start_year or end_year:
                                 # Get file commit info for more accurate dating
                                 commits_response = await client.get(
-                                    f"https://api.github.com/repos/{owner}/{repo}/commits",
+                                    f"{GITHUB_API_URL}/repos/{owner}/{repo}/commits",
                                     params={"path": item["path"], "per_page": 1},
                                     headers={
                                         "Accept": "application/vnd.github.v3+json",
@@ -173,17 +180,22 @@ class GitHubScraperService:
                                     ):
                                         continue
                             
-                            snippet = CodeSnippet(
+                            snippet = CodeSnippet.model_construct(
                                 content=content,
                                 file_path=item["path"],
                                 language=GitHubScraperService._detect_language(item["name"], content),
                                 size_bytes=item["size"],
-                                lines_count=len(content.split('\n'))
+                                lines_count=content.count('\n') + 1
                             )
                             snippets.append(snippet)
+                        else:
+                            record_skipped("files", f"http_{file_response.status_code}")
                             
-                    except Exception:
-                        continue  # Skip files that can't be processed
+                    except Exception as e:
+                        # Skip files that can't be processed
+                        logger.debug("Skipping file %s in %s/%s: %r", item["path"], owner, repo, e)
+                        record_skipped("files", type(e).__name__)
+                        continue
         
         return snippets
     
@@ -199,9 +211,9 @@ class GitHubScraperService:
         if end_year:
             params["until"] = f"{end_year}-12-31T23:59:59Z"
         
-        async with httpx.AsyncClient() as client:
+        async with github_client() as client:
             response = await client.get(
-                f"https://api.github.com/repos/{owner}/{repo}/commits",
+                f"{GITHUB_API_URL}/repos/{owner}/{repo}/commits",
                 params=params,
                 headers={
                     "Accept": "application/vnd.github.v3+json",
@@ -239,20 +251,24 @@ class GitHubScraperService:
                                 break
                             
                             if GitHubScraperService._is_code_file(file["filename"]) and file.get("patch"):
-                                snippet = CodeSnippet(
+                                snippet = CodeSnippet.model_construct(
                                     content=file["patch"],
                                     file_path=file["filename"],
                                     language=GitHubScraperService._detect_language(file["filename"]),
                                     size_bytes=len(file["patch"]),
-                                    lines_count=len(file["patch"].split('\n')),
+                                    lines_count=file["patch"].count('\n') + 1,
                                     commit_sha=commit["sha"],
                                     commit_message=commit["commit"]["message"],
                                     commit_date=commit["commit"]["committer"]["date"],
                                     author=commit["commit"]["author"]["name"]
                                 )
                                 snippets.append(snippet)
+                    else:
+                        record_skipped("commits", f"http_{commit_response.status_code}")
                                 
-                except Exception:
+                except Exception as e:
+                    logger.debug("Skipping commit %s in %s/%s: %r", commit.get("sha"), owner, repo, e)
+                    record_skipped("commits", type(e).__name__)
                     continue
         
         return snippets
@@ -262,10 +278,10 @@ class GitHubScraperService:
         """Scrape repository pull requests"""
         snippets = []
         
-        async with httpx.AsyncClient() as client:
+        async with github_client() as client:
             # Get closed pull requests (merged ones contain actual changes)
             response = await client.get(
-                f"https://api.github.com/repos/{owner}/{repo}/pulls",
+                f"{GITHUB_API_URL}/repos/{owner}/{repo}/pulls",
                 params={"state": "closed", "per_page": min(top_k * 2, 100)},
                 headers={
                     "Accept": "application/vnd.github.v3+json",
@@ -290,7 +306,7 @@ class GitHubScraperService:
                 try:
                     # Get PR files
                     files_response = await client.get(
-                        f"https://api.github.com/repos/{owner}/{repo}/pulls/{pr['number']}/files",
+                        f"{GITHUB_API_URL}/repos/{owner}/{repo}/pulls/{pr['number']}/files",
                         headers={
                             "Accept": "application/vnd.github.v3+json",
                             "User-Agent": "GitHub-Repository-Scraper-Service"
@@ -306,20 +322,24 @@ class GitHubScraperService:
                                 break
                             
                             if GitHubScraperService._is_code_file(file["filename"]) and file.get("patch"):
-                                snippet = CodeSnippet(
+                                snippet = CodeSnippet.model_construct(
                                     content=file["patch"],
                                     file_path=file["filename"],
                                     language=GitHubScraperService._detect_language(file["filename"]),
                                     size_bytes=len(file["patch"]),
-                                    lines_count=len(file["patch"].split('\n')),
+                                    lines_count=file["patch"].count('\n') + 1,
                                     pr_number=pr["number"],
                                     pr_title=pr["title"],
                                     commit_date=pr["created_at"],
                                     author=pr["user"]["login"]
                                 )
                                 snippets.append(snippet)
+                    else:
+                        record_skipped("pull_requests", f"http_{files_response.status_code}")
                                 
-                except Exception:
+                except Exception as e:
+                    logger.debug("Skipping pull request #%s in %s/%s: %r", pr.get("number"), owner, repo, e)
+                    record_skipped("pull_requests", type(e).__name__)
                     continue
         
         return snippets
@@ -328,6 +348,9 @@ class GitHubScraperService:
     async def scrape_repository(request: ScrapingRequest) -> ScrapingResponse:
         """Main method to scrape a GitHub repository"""
         owner, repo = GitHubScraperService._parse_github_url(str(request.repo_url))
+        chunked = request.chunking == ChunkingStrategy.FUNCTION
+        if chunked and request.mode != ScrapingMode.FILES:
+            raise HTTPException(status_code=400, detail="chunking is only supported in files mode")
         
         try:
             # Get repository information
@@ -349,6 +372,13 @@ class GitHubScraperService:
             else:
                 raise HTTPException(status_code=400, detail="Invalid scraping mode")
             
+            # top_k applies to chunks: split the selected files, then cut down
+            total_found = len(snippets)
+            if chunked:
+                snippets = await chunk_snippets(snippets)
+                total_found = len(snippets)
+                snippets = snippets[:request.top_k]
+            
             # Build time window info
             time_window = None
             if request.start_year or request.end_year:
@@ -357,12 +387,14 @@ class GitHubScraperService:
                     "end_year": request.end_year
                 }
             
-            return ScrapingResponse(
+            # Everything below is built from typed values we produced ourselves,
+            # so skip re-validating up to top_k full file bodies
+            return ScrapingResponse.model_construct(
                 repository=repo_info,
                 mode=request.mode,
                 time_window=time_window,
                 code_snippets=snippets,
-                total_found=len(snippets),  # In a real implementation, this would be the total before limiting
+                total_found=total_found,
                 returned_count=len(snippets)
             )
             
@@ -0,0 +1,269 @@
+"""
+State shared by every worker process of the service, kept in SQLite.
+
+Holds three tables:
+
+- ``http_cache``: upstream GET responses (raw body, headers, ETag)
+- ``inflight``: cache keys some process is currently fetching, so other
+  workers wait for its result instead of repeating the call
+- ``quota``: GitHub rate-limit accounting per token and resource
+
+With the default ``SHARED_STATE_PATH`` of ``:memory:`` the state is private
+to the process, which is all a single worker needs. Pointing it at a file
+shares it between ``uvicorn --workers N`` processes (WAL mode). All SQLite
+work runs on one dedicated thread per process so the event loop never
+blocks on disk and connections are never shared across threads.
+"""
+
+import asyncio
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import httpx
+
+from app.config import CACHE_MAX_BYTES, SHARED_STATE_PATH
+
+# Run a size check on the cache after this many writes
+_PRUNE_EVERY = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS http_cache (
+    key TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    etag TEXT,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS http_cache_stored_at ON http_cache (stored_at);
+CREATE TABLE IF NOT EXISTS inflight (
+    key TEXT PRIMARY KEY,
+    started_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS quota (
+    bucket TEXT PRIMARY KEY,
+    remaining INTEGER NOT NULL,
+    reset_at REAL NOT NULL
+);
+"""
+
+
+@dataclass
+class CachedResponse:
+    """An upstream response with its body fully read, as stored in the cache"""
+    status: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+    etag: Optional[str]
+    stored_at: float
+
+    def to_response(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(self.status, headers=self.headers, content=self.body, request=request)
+
+
+class SharedState:
+    """SQLite-backed cache, in-flight registry and quota ledger"""
+
+    def __init__(self, path: str = SHARED_STATE_PATH, max_cache_bytes: int = CACHE_MAX_BYTES):
+        self._path = path
+        self._max_cache_bytes = max_cache_bytes
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-state")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+
+    async def _run(self, fn: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _connection(self) -> sqlite3.Connection:
+        # Only ever called on the executor thread
+        if self._conn is None:
+            conn = sqlite3.connect(self._path, timeout=30.0, isolation_level=None)
+            if self._path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    # HTTP cache
+
+    def _get_cached(self, key: str) -> Optional[CachedResponse]:
+        row = self._connection().execute(
+            "SELECT status, headers, body, etag, stored_at FROM http_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        status, headers, body, etag, stored_at = row
+        return CachedResponse(status, [tuple(h) for h in json.loads(headers)], body, etag, stored_at)
+
+    def _put_cached(self, key: str, entry: CachedResponse) -> None:
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO http_cache (key, status, headers, body, etag, size, stored_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, entry.status, json.dumps(entry.headers), entry.body, entry.etag, len(entry.body), entry.stored_at),
+        )
+        self._writes += 1
+        if self._writes % _PRUNE_EVERY == 0:
+            self._prune(conn)
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        """Evict the oldest entries once the cache exceeds its byte budget"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+        excess = total - self._max_cache_bytes
+        if excess <= 0:
+            return
+        conn.execute(
+            "DELETE FROM http_cache WHERE key IN ("
+            "  SELECT key FROM ("
+            "    SELECT key, SUM(size) OVER (ORDER BY stored_at) - size AS evicted_before FROM http_cache"
+            "  ) WHERE evicted_before < ?"
+            ")",
+            (excess,),
+        )
+
+    def _touch_cached(self, key: str, stored_at: float) -> None:
+        self._connection().execute("UPDATE http_cache SET stored_at = ? WHERE key = ?", (stored_at, key))
+
+    async def get_cached(self, key: str) -> Optional[CachedResponse]:
+        return await self._run(self._get_cached, key)
+
+    async def put_cached(self, key: str, entry: CachedResponse) -> None:
+        await self._run(self._put_cached, key, entry)
+
+    async def touch_cached(self, key: str, stored_at: float) -> None:
+        """Mark a cached entry as fresh again after a 304 revalidation"""
+        await self._run(self._touch_cached, key, stored_at)
+
+    # In-flight coalescing
+
+    def _acquire_inflight(self, key: str, ttl: float) -> bool:
+        now = time.time()
+        conn = self._connection()
+        conn.execute("DELETE FROM inflight WHERE key = ? AND expires_at < ?", (key, now))
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO inflight (key, started_at, expires_at) VALUES (?, ?, ?)",
+            (key, now, now + ttl),
+        )
+        return cursor.rowcount == 1
+
+    def _release_inflight(self, key: str) -> None:
+        self._connection().execute("DELETE FROM inflight WHERE key = ?", (key,))
+
+    def _poll_inflight(self, key: str) -> Tuple[bool, Optional[CachedResponse]]:
+        still_running = self._connection().execute(
+            "SELECT 1 FROM inflight WHERE key = ? AND expires_at >= ?", (key, time.time())
+        ).fetchone() is not None
+        return still_running, self._get_cached(key)
+
+    async def acquire_inflight(self, key: str, ttl: float) -> bool:
+        """Claim a key for fetching; False if another process already holds it"""
+        return await self._run(self._acquire_inflight, key, ttl)
+
+    async def release_inflight(self, key: str) -> None:
+        await self._run(self._release_inflight, key)
+
+    async def wait_for_inflight(
+        self, key: str, newer_than: float, timeout: float, interval: float = 0.05
+    ) -> Optional[CachedResponse]:
+        """
+        Wait for another process to finish fetching ``key``. Returns the entry
+        it stored, or None if it stored nothing usable or ran out of time.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            running, entry = await self._run(self._poll_inflight, key)
+            if entry is not None and entry.stored_at >= newer_than:
+                return entry
+            if not running:
+                return None
+            await asyncio.sleep(interval)
+        return None
+
+    # Rate-limit accounting
+
+    def _reserve_quota(self, bucket: str, reserve: int) -> Optional[float]:
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT remaining, reset_at FROM quota WHERE bucket = ?", (bucket,)).fetchone()
+            if row is None or row[1] <= now:
+                # Unknown quota or a new window: allow and let the response headers fill it in
+                conn.execute("COMMIT")
+                return None
+            remaining, reset_at = row
+            if remaining <= reserve:
+                conn.execute("COMMIT")
+                return reset_at - now
+            conn.execute("UPDATE quota SET remaining = remaining - 1 WHERE bucket = ?", (bucket,))
+            conn.execute("COMMIT")
+            return None
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _update_quota(self, bucket: str, remaining: int, reset_at: float) -> None:
+        # Within the same window never raise the count: other workers may have
+        # reserved calls that GitHub had not seen when this response was sent
+        self._connection().execute(
+            "INSERT INTO quota (bucket, remaining, reset_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (bucket) DO UPDATE SET "
+            "  remaining = CASE WHEN quota.reset_at = excluded.reset_at "
+            "    THEN MIN(quota.remaining, excluded.remaining) ELSE excluded.remaining END, "
+            "  reset_at = excluded.reset_at",
+            (bucket, remaining, reset_at),
+        )
+
+    def _refund_quota(self, bucket: str) -> None:
+        self._connection().execute(
+            "UPDATE quota SET remaining = remaining + 1 WHERE bucket = ? AND reset_at > ?", (bucket, time.time())
+        )
+
+    async def reserve_quota(self, bucket: str, reserve: int = 0) -> Optional[float]:
+        """
+        Take one call from the shared budget of ``bucket``. Returns None when
+        the call may proceed, otherwise the seconds until the quota resets.
+        """
+        return await self._run(self._reserve_quota, bucket, reserve)
+
+    async def refund_quota(self, bucket: str) -> None:
+        """Give back a reserved call that GitHub did not charge (a 304)"""
+        await self._run(self._refund_quota, bucket)
+
+    async def update_quota(self, bucket: str, remaining: int, reset_at: float) -> None:
+        """Record the quota reported by GitHub's X-RateLimit-* headers"""
+        await self._run(self._update_quota, bucket, remaining, reset_at)
+
+    def close(self) -> None:
+        def _close():
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+        self._executor.submit(_close).result()
+        self._executor.shutdown(wait=True)
+
+
+_shared_state: Optional[SharedState] = None
+
+
+def get_shared_state() -> SharedState:
+    """Process-wide SharedState, created on first use"""
+    global _shared_state
+    if _shared_state is None:
+        _shared_state = SharedState()
+    return _shared_state
+
+
+def close_shared_state() -> None:
+    global _shared_state
+    if _shared_state is not None:
+        _shared_state.close()
+        _shared_state = None
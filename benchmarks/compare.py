@@ -0,0 +1,80 @@
+"""
+Compare two benchmark reports produced by ``benchmarks.run``.
+
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 10]
+
+Prints per-scenario deltas and exits non-zero when any tracked metric
+regresses by more than ``--threshold`` percent.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# (label, path into the scenario dict, True when higher is better)
+METRICS: List[Tuple[str, Tuple[str, ...], bool]] = [
+    ("p50 ms", ("latency_ms", "p50"), False),
+    ("p99 ms", ("latency_ms", "p99"), False),
+    ("rps", ("throughput_rps",), True),
+    ("peak rss MB", ("peak_rss_bytes",), False),
+    ("upstream/req", ("upstream_calls_per_request",), False),
+]
+
+
+def _lookup(scenario: dict, path: Tuple[str, ...]) -> Optional[float]:
+    value = scenario
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def _format(label: str, value: Optional[float]) -> str:
+    if value is None:
+        return "n/a"
+    if label == "peak rss MB":
+        return f"{value / (1024 * 1024):.1f}"
+    return f"{value:.2f}"
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> bool:
+    """Print a comparison table; return True if no metric regressed past threshold"""
+    ok = True
+    base_by_name = {s["name"]: s for s in baseline["scenarios"]}
+    print(f"baseline:  {baseline.get('git_revision') or '?'} {baseline.get('label') or ''}")
+    print(f"candidate: {candidate.get('git_revision') or '?'} {candidate.get('label') or ''}")
+    for scenario in candidate["scenarios"]:
+        base = base_by_name.get(scenario["name"])
+        print(f"\n{scenario['name']}")
+        if base is None:
+            print("  (no baseline)")
+            continue
+        for label, path, higher_is_better in METRICS:
+            old, new = _lookup(base, path), _lookup(scenario, path)
+            delta = ""
+            if old and new is not None:
+                change = (new - old) / old * 100.0
+                regressed = change < -threshold if higher_is_better else change > threshold
+                delta = f"{change:+.1f}%" + ("  REGRESSION" if regressed else "")
+                ok = ok and not regressed
+            print(f"  {label:<14} {_format(label, old):>10} -> {_format(label, new):>10}  {delta}")
+    return ok
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed regression in percent")
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(args.baseline.read_text())
+    candidate = json.loads(args.candidate.read_text())
+    sys.exit(0 if compare(baseline, candidate, args.threshold) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+Local fake of the GitHub REST API used by the benchmark harness.
+
+Serves deterministic synthetic repositories for every route the service
+touches (repos, contents, git trees, commits, pulls, search and raw
+downloads), with optional latency and 502 error injection and per-route
+call counters. Like raw.githubusercontent.com, raw downloads are linked on a
+separate origin (a second port, ``--raw-port``) so the service treats them
+as raw downloads rather than API calls.
+
+Run standalone:
+
+    python -m benchmarks.fake_github --port 9000 --files 200 --latency-ms 20
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+
+
+@dataclass
+class FakeGitHubConfig:
+    """Shape of the synthetic data and injected latency"""
+    base_url: str = "http://127.0.0.1:9000"
+    raw_base_url: str = "http://127.0.0.1:9001"
+    repos: int = 50
+    files: int = 100
+    file_size: int = 4096
+    commits: int = 100
+    files_per_commit: int = 3
+    pulls: int = 100
+    files_per_pull: int = 3
+    patch_size: int = 1024
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    raw_latency_ms: float = 0.0
+    tail_ratio: float = 0.0
+    tail_ms: float = 0.0
+    error_ratio: float = 0.0
+    rate_limit: int = 1000000
+    seed: int = 0
+
+
+FILE_EXTENSIONS = [".py", ".js", ".ts", ".go", ".rs", ".java", ".txt"]
+
+# Route templates used as keys for the upstream call counters
+ROUTES = {
+    "repo": "/repos/{owner}/{repo}",
+    "contents": "/repos/{owner}/{repo}/contents",
+    "tree": "/repos/{owner}/{repo}/git/trees/{sha}",
+    "commits": "/repos/{owner}/{repo}/commits",
+    "commit": "/repos/{owner}/{repo}/commits/{sha}",
+    "pulls": "/repos/{owner}/{repo}/pulls",
+    "pull_files": "/repos/{owner}/{repo}/pulls/{number}/files",
+    "search": "/search/repositories",
+    "raw": "/raw/{owner}/{repo}/{path}",
+}
+
+
+def _sha(*parts) -> str:
+    return hashlib.sha1("/".join(str(p) for p in parts).encode()).hexdigest()
+
+
+def _timestamp(index: int) -> str:
+    """Spread synthetic dates over 2015-2024 so time windows have something to filter"""
+    year = 2024 - (index % 10)
+    month = (index % 12) + 1
+    day = (index % 28) + 1
+    return f"{year}-{month:02d}-{day:02d}T12:00:00Z"
+
+
+def _file_name(index: int) -> str:
+    return f"module_{index:05d}{FILE_EXTENSIONS[index % len(FILE_EXTENSIONS)]}"
+
+
+def _source(seed: str, size: int) -> str:
+    """Deterministic text of roughly ``size`` bytes"""
+    line = f"value_{seed[:8]} = compute({seed[8:16]!r})  # synthetic\n"
+    count = max(1, size // len(line))
+    return line * count
+
+
+def _patch(seed: str, size: int) -> str:
+    body = _source(seed, size)
+    lines = body.splitlines()
+    return f"@@ -1,{len(lines)} +1,{len(lines)} @@\n" + "\n".join(f"+{l}" for l in lines)
+
+
+def create_app(config: FakeGitHubConfig) -> FastAPI:
+    """Build the fake API application for the given configuration"""
+    app = FastAPI(title="Fake GitHub API", docs_url=None, redoc_url=None, openapi_url=None)
+    calls: Counter = Counter()
+    rng = random.Random(config.seed)
+    window = {"used": 0, "reset": int(time.time()) + 3600}
+
+    @app.middleware("http")
+    async def rate_limit_headers(request: Request, call_next):
+        """Mimic GitHub's X-RateLimit-* headers on API routes"""
+        response = await call_next(request)
+        if not request.url.path.startswith(("/raw/", "/_bench/")):
+            window["used"] += 1
+            response.headers["x-ratelimit-limit"] = str(config.rate_limit)
+            response.headers["x-ratelimit-remaining"] = str(max(0, config.rate_limit - window["used"]))
+            response.headers["x-ratelimit-reset"] = str(window["reset"])
+            response.headers["x-ratelimit-resource"] = "search" if request.url.path.startswith("/search/") else "core"
+        return response
+
+    async def _delay(route: str) -> None:
+        calls[ROUTES[route]] += 1
+        delay = config.raw_latency_ms if route == "raw" and config.raw_latency_ms else config.latency_ms
+        if config.jitter_ms:
+            delay += rng.uniform(0, config.jitter_ms)
+        if config.tail_ratio and rng.random() < config.tail_ratio:
+            delay += config.tail_ms
+        if delay > 0:
+            await asyncio.sleep(delay / 1000.0)
+        if config.error_ratio and rng.random() < config.error_ratio:
+            raise HTTPException(status_code=502, detail="Injected upstream failure")
+
+    def _check_repo(owner: str, repo: str) -> int:
+        if owner != "bench" or not repo.startswith("repo-"):
+            raise HTTPException(status_code=404, detail="Not Found")
+        try:
+            index = int(repo[len("repo-"):])
+        except ValueError:
+            raise HTTPException(status_code=404, detail="Not Found")
+        if index >= config.repos:
+            raise HTTPException(status_code=404, detail="Not Found")
+        return index
+
+    def _repo_payload(index: int) -> dict:
+        name = f"repo-{index}"
+        return {
+            "name": name,
+            "full_name": f"bench/{name}",
+            "description": f"Synthetic benchmark repository {index}",
+            "html_url": f"https://github.com/bench/{name}",
+            "stargazers_count": 100000 - index,
+            "forks_count": 10000 - index,
+            "language": "Python",
+            "created_at": _timestamp(index),
+            "updated_at": _timestamp(index + 1),
+            "owner": {"login": "bench", "avatar_url": "https://avatars.githubusercontent.com/u/0"},
+            "default_branch": "main",
+        }
+
+    def _file_entry(owner: str, repo: str, index: int) -> dict:
+        name = _file_name(index)
+        return {
+            "name": name,
+            "path": name,
+            "sha": _sha(owner, repo, name),
+            "size": config.file_size,
+            "type": "file",
+            "download_url": f"{config.raw_base_url}/raw/{owner}/{repo}/{name}",
+        }
+
+    def _commit_summary(owner: str, repo: str, index: int) -> dict:
+        sha = _sha(owner, repo, "commit", index)
+        return {
+            "sha": sha,
+            "url": f"{config.base_url}/repos/{owner}/{repo}/commits/{sha}",
+            "commit": {
+                "message": f"Synthetic commit {index}",
+                "author": {"name": f"author-{index % 7}", "date": _timestamp(index)},
+                "committer": {"name": f"author-{index % 7}", "date": _timestamp(index)},
+            },
+        }
+
+    def _changed_files(seed: str, count: int) -> List[dict]:
+        files = []
+        for i in range(count):
+            patch = _patch(_sha(seed, i), config.patch_size)
+            files.append({
+                "filename": f"src/{_file_name(i)}",
+                "status": "modified",
+                "additions": patch.count("\n+"),
+                "deletions": 0,
+                "patch": patch,
+            })
+        return files
+
+    @app.get("/repos/{owner}/{repo}")
+    async def get_repo(owner: str, repo: str):
+        index = _check_repo(owner, repo)
+        await _delay("repo")
+        return _repo_payload(index)
+
+    @app.get("/repos/{owner}/{repo}/contents")
+    async def get_contents(owner: str, repo: str):
+        _check_repo(owner, repo)
+        await _delay("contents")
+        return [_file_entry(owner, repo, i) for i in range(config.files)]
+
+    @app.get("/repos/{owner}/{repo}/git/trees/{sha}")
+    async def get_tree(owner: str, repo: str, sha: str):
+        _check_repo(owner, repo)
+        await _delay("tree")
+        return {
+            "sha": sha,
+            "truncated": False,
+            "tree": [
+                {"path": _file_name(i), "mode": "100644", "type": "blob",
+                 "sha": _sha(owner, repo, _file_name(i)), "size": config.file_size}
+                for i in range(config.files)
+            ],
+        }
+
+    @app.get("/repos/{owner}/{repo}/commits")
+    async def list_commits(owner: str, repo: str, per_page: int = 30, page: int = 1,
+                           path: Optional[str] = None):
+        _check_repo(owner, repo)
+        await _delay("commits")
+        start = (page - 1) * per_page
+        end = min(start + per_page, 1 if path else config.commits)
+        return [_commit_summary(owner, repo, i) for i in range(start, end)]
+
+    @app.get("/repos/{owner}/{repo}/commits/{sha}")
+    async def get_commit(owner: str, repo: str, sha: str):
+        _check_repo(owner, repo)
+        await _delay("commit")
+        payload = {"sha": sha, "commit": {"message": "Synthetic commit"}}
+        payload["files"] = _changed_files(sha, config.files_per_commit)
+        return payload
+
+    @app.get("/repos/{owner}/{repo}/pulls")
+    async def list_pulls(owner: str, repo: str, state: str = "open", per_page: int = 30, page: int = 1):
+        _check_repo(owner, repo)
+        await _delay("pulls")
+        start = (page - 1) * per_page
+        end = min(start + per_page, config.pulls)
+        return [
+            {
+                "number": i + 1,
+                "title": f"Synthetic pull request {i + 1}",
+                "state": state,
+                "created_at": _timestamp(i),
+                "user": {"login": f"contributor-{i % 5}"},
+            }
+            for i in range(start, end)
+        ]
+
+    @app.get("/repos/{owner}/{repo}/pulls/{number}/files")
+    async def list_pull_files(owner: str, repo: str, number: int):
+        _check_repo(owner, repo)
+        await _delay("pull_files")
+        return _changed_files(_sha(owner, repo, "pull", number), config.files_per_pull)
+
+    @app.get("/search/repositories")
+    async def search_repositories(q: str = "", per_page: int = Query(default=30, le=100), page: int = 1):
+        await _delay("search")
+        start = (page - 1) * per_page
+        end = min(start + per_page, config.repos)
+        return {
+            "total_count": config.repos,
+            "incomplete_results": False,
+            "items": [_repo_payload(i) for i in range(start, end)],
+        }
+
+    @app.get("/raw/{owner}/{repo}/{path:path}", response_class=PlainTextResponse)
+    async def raw_download(owner: str, repo: str, path: str):
+        _check_repo(owner, repo)
+        await _delay("raw")
+        return _source(_sha(owner, repo, path), config.file_size)
+
+    # Harness control endpoints
+
+    @app.get("/_bench/stats")
+    async def get_stats():
+        return {"total": sum(calls.values()), "by_route": dict(calls)}
+
+    @app.delete("/_bench/stats")
+    async def reset_stats():
+        calls.clear()
+        return {"total": 0, "by_route": {}}
+
+    @app.get("/_bench/config")
+    async def get_config():
+        return asdict(config)
+
+    @app.post("/_bench/config")
+    async def update_config(request: Request):
+        updates: Dict = await request.json()
+        for key, value in updates.items():
+            if not hasattr(config, key):
+                raise HTTPException(status_code=400, detail=f"Unknown config key: {key}")
+            setattr(config, key, type(getattr(config, key))(value))
+        return asdict(config)
+
+    return app
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run a local fake GitHub API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--raw-port", type=int, default=None, help="Port for raw downloads (default: --port + 1)")
+    defaults = FakeGitHubConfig()
+    for field, value in asdict(defaults).items():
+        if field in ("base_url", "raw_base_url"):
+            continue
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(value), default=value)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import socket
+    import uvicorn
+
+    args = build_arg_parser().parse_args(argv)
+    raw_port = args.raw_port if args.raw_port is not None else args.port + 1
+    options = {k: v for k, v in vars(args).items() if k not in ("host", "port", "raw_port")}
+    config = FakeGitHubConfig(
+        base_url=f"http://{args.host}:{args.port}", raw_base_url=f"http://{args.host}:{raw_port}", **options
+    )
+    # One server listening on both origins, sharing call counters and config
+    sockets = []
+    for port in (args.port, raw_port):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((args.host, port))
+        sockets.append(sock)
+    server = uvicorn.Server(uvicorn.Config(create_app(config), log_level="warning"))
+    server.run(sockets=sockets)
+
+
+if __name__ == "__main__":
+    main()
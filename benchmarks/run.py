@@ -0,0 +1,365 @@
+"""
+Offline benchmark suite for the scraping service.
+
+Starts the fake GitHub API (benchmarks/fake_github.py) and, for every
+scenario, a fresh service process pointed at it via ``GITHUB_API_URL``.
+Each scenario drives ``/scrape`` or ``/discover`` at a fixed concurrency
+and records latency percentiles, throughput, the service's peak RSS and the
+number of upstream calls the fake server received per request.
+
+The result is written as JSON so runs can be compared across commits with
+``python -m benchmarks.compare old.json new.json``.
+
+    python -m benchmarks.run --requests 50 --latency-ms 20 --output bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+SCHEMA_VERSION = 1
+
+
+@dataclass
+class Scenario:
+    """A single load pattern against the service"""
+    name: str
+    method: str
+    path: str
+    concurrency: int
+    json: Optional[dict] = None
+    params: Optional[dict] = None
+    tags: Dict[str, str] = field(default_factory=dict)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _peak_rss_bytes(pid: int) -> Optional[int]:
+    """High-water resident set size of a process (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def _children(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as children:
+            return [int(child) for child in children.read().split()]
+    except OSError:
+        return []
+
+
+def _total_peak_rss_bytes(pid: int) -> Optional[int]:
+    """Peak RSS summed over a process and its worker children"""
+    values = [_peak_rss_bytes(p) for p in [pid, *_children(pid)]]
+    values = [v for v in values if v is not None]
+    return sum(values) if values else None
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _subprocess_env(extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    env = dict(os.environ)
+    # Never route loopback traffic through a proxy picked up from the environment
+    env["NO_PROXY"] = env["no_proxy"] = "127.0.0.1,localhost"
+    env.update(extra or {})
+    return env
+
+
+async def _wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(trust_env=False) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"Process for {url} exited with code {process.returncode}")
+            try:
+                response = await client.get(url, timeout=1.0)
+                if response.status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+def _stop(process: subprocess.Popen) -> None:
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def build_scenarios(args: argparse.Namespace) -> List[Scenario]:
+    repo_url = "https://github.com/bench/repo-0"
+    scenarios = []
+    for mode in ("files", "commits", "pull_requests"):
+        scenarios.append(Scenario(
+            name=f"scrape_{mode}",
+            method="POST",
+            path="/scrape",
+            concurrency=args.scrape_concurrency,
+            json={"repo_url": repo_url, "mode": mode, "top_k": args.top_k},
+            tags={"endpoint": "/scrape", "mode": mode},
+        ))
+    # Time windows make files mode look up the last commit of every file
+    scenarios.append(Scenario(
+        name="scrape_files_time_window",
+        method="POST",
+        path="/scrape",
+        concurrency=args.scrape_concurrency,
+        json={"repo_url": repo_url, "mode": "files", "top_k": args.top_k,
+              "start_year": 2015, "end_year": 2024},
+        tags={"endpoint": "/scrape", "mode": "files", "time_window": "2015-2024"},
+    ))
+    for concurrency in args.discover_concurrency:
+        scenarios.append(Scenario(
+            name=f"discover_c{concurrency}",
+            method="GET",
+            path="/discover",
+            concurrency=concurrency,
+            params={"min_stars": 10, "languages": "Python", "top_k": args.top_k},
+            tags={"endpoint": "/discover"},
+        ))
+    if args.only:
+        scenarios = [s for s in scenarios if s.name in args.only]
+    return scenarios
+
+
+async def _drive(client: httpx.AsyncClient, scenario: Scenario, total: int) -> dict:
+    """Issue ``total`` requests with ``scenario.concurrency`` workers"""
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    remaining = iter(range(total))
+
+    async def worker() -> None:
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await client.request(
+                    scenario.method, scenario.path, json=scenario.json, params=scenario.params
+                )
+                if response.status_code != 200:
+                    errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+                    continue
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000.0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(scenario.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50), 3),
+            "p90": round(_percentile(latencies, 90), 3),
+            "p99": round(_percentile(latencies, 99), 3),
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+        "throughput_rps": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        "succeeded": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+    }
+
+
+def _service_env(args: argparse.Namespace) -> Dict[str, str]:
+    """Environment every service process gets, after --service-env overrides"""
+    # Off by default: every request of a scenario is identical, so a cached run
+    # would measure cache hits instead of the upstream path
+    env = {"CACHE_ENABLED": "true" if args.cache else "false"}
+    env.update(dict(item.split("=", 1) for item in args.service_env))
+    return env
+
+
+async def run_scenario(scenario: Scenario, args: argparse.Namespace, fake_url: str) -> dict:
+    port = _free_port()
+    service_url = f"http://127.0.0.1:{port}"
+    state_dir = tempfile.TemporaryDirectory(prefix="bench-state-")
+    env = {"GITHUB_API_URL": fake_url}
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+               "--port", str(port), "--log-level", "warning"]
+    if args.workers > 1:
+        # Same setup as `make run-workers`: shared SQLite state and multiprocess metrics
+        os.makedirs(os.path.join(state_dir.name, "prometheus"))
+        env["SHARED_STATE_PATH"] = os.path.join(state_dir.name, "shared.sqlite3")
+        env["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(state_dir.name, "prometheus")
+        command += ["--workers", str(args.workers)]
+    env.update(_service_env(args))
+    service = subprocess.Popen(command, cwd=ROOT, env=_subprocess_env(env))
+    try:
+        await _wait_until_ready(f"{service_url}/health", service)
+        limits = httpx.Limits(max_connections=scenario.concurrency, max_keepalive_connections=scenario.concurrency)
+        async with httpx.AsyncClient(
+            base_url=service_url, timeout=args.timeout, limits=limits, trust_env=False
+        ) as client, httpx.AsyncClient(base_url=fake_url, trust_env=False) as fake:
+            if args.warmup:
+                await _drive(client, scenario, args.warmup)
+            await fake.delete("/_bench/stats")
+            result = await _drive(client, scenario, args.requests)
+            upstream = (await fake.get("/_bench/stats")).json()
+
+        per_request = upstream["total"] / result["succeeded"] if result["succeeded"] else None
+        return {
+            "name": scenario.name,
+            "tags": scenario.tags,
+            "concurrency": scenario.concurrency,
+            "requests": args.requests,
+            **result,
+            "peak_rss_bytes": _total_peak_rss_bytes(service.pid),
+            "upstream_calls": upstream["total"],
+            "upstream_calls_per_request": round(per_request, 3) if per_request is not None else None,
+            "upstream_calls_by_route": upstream["by_route"],
+        }
+    finally:
+        _stop(service)
+        state_dir.cleanup()
+
+
+async def run(args: argparse.Namespace) -> dict:
+    fake_port = _free_port()
+    fake_url = f"http://127.0.0.1:{fake_port}"
+    fake_args = [
+        "--port", str(fake_port),
+        "--raw-port", str(_free_port()),
+        "--files", str(args.files),
+        "--file-size", str(args.file_size),
+        "--commits", str(args.commits),
+        "--pulls", str(args.pulls),
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--raw-latency-ms", str(args.raw_latency_ms),
+        "--tail-ratio", str(args.tail_ratio),
+        "--tail-ms", str(args.tail_ms),
+        "--error-ratio", str(args.error_ratio),
+    ]
+    fake = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_github", *fake_args], cwd=ROOT, env=_subprocess_env()
+    )
+    try:
+        await _wait_until_ready(f"{fake_url}/_bench/stats", fake)
+        results = []
+        for scenario in build_scenarios(args):
+            print(f"running {scenario.name} (concurrency={scenario.concurrency})", file=sys.stderr)
+            results.append(await run_scenario(scenario, args, fake_url))
+    finally:
+        _stop(fake)
+
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "label": args.label,
+        "git_revision": _git_revision(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "top_k": args.top_k,
+            "files": args.files,
+            "file_size": args.file_size,
+            "commits": args.commits,
+            "pulls": args.pulls,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "raw_latency_ms": args.raw_latency_ms,
+            "tail_ratio": args.tail_ratio,
+            "tail_ms": args.tail_ms,
+            "error_ratio": args.error_ratio,
+            "workers": args.workers,
+            "cache_enabled": _service_env(args)["CACHE_ENABLED"].lower() not in ("0", "false", "no"),
+            "service_env": args.service_env,
+        },
+        "scenarios": results,
+    }
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite")
+    parser.add_argument("--requests", type=int, default=50, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests per scenario")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--scrape-concurrency", type=int, default=4)
+    parser.add_argument("--discover-concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--files", type=int, default=100, help="Files per synthetic repository")
+    parser.add_argument("--file-size", type=int, default=4096, help="Bytes per synthetic file")
+    parser.add_argument("--commits", type=int, default=100)
+    parser.add_argument("--pulls", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Injected latency per upstream call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform random latency added on top")
+    parser.add_argument("--raw-latency-ms", type=float, default=0.0, help="Latency override for raw downloads")
+    parser.add_argument("--tail-ratio", type=float, default=0.0, help="Fraction of calls that get --tail-ms extra")
+    parser.add_argument("--tail-ms", type=float, default=0.0)
+    parser.add_argument("--error-ratio", type=float, default=0.0, help="Fraction of upstream calls answered with 502")
+    parser.add_argument("--workers", type=int, default=1, help="Service worker processes")
+    parser.add_argument("--cache", action="store_true",
+                        help="Keep the service's HTTP cache on (repeated requests then measure cache hits)")
+    parser.add_argument("--service-env", nargs="+", default=[], metavar="KEY=VALUE",
+                        help="Extra environment for the service, e.g. HEDGE_PERCENTILE=95")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Client timeout per request in seconds")
+    parser.add_argument("--only", nargs="+", help="Run only the named scenarios")
+    parser.add_argument("--label", default=None, help="Free-form label stored in the output")
+    parser.add_argument("--output", type=Path, default=None, help="Write JSON here instead of stdout")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_arg_parser().parse_args(argv)
+    report = asyncio.run(run(args))
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(payload + "\n")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import asyncio
+
+import httpx
+
+from app.observability.tracing import trace_request
+from app.services import github_client
+from app.services.github_client import CachingTransport
+from app.services.shared_state import SharedState
+
+URL = f"{github_client.GITHUB_API_URL}/repos/octo/repo"
+
+
+def test_cache_hits_are_visible_in_the_waterfall():
+    upstream = httpx.MockTransport(lambda request: httpx.Response(200, json={"name": "repo"}))
+    state = SharedState(":memory:")
+
+    async def run():
+        async with httpx.AsyncClient(transport=CachingTransport(upstream, state)) as client:
+            await client.get(URL)
+            async with trace_request("scrape_repository", profile=True) as trace:
+                response = await client.get(URL)
+        return response, trace.waterfall()
+
+    try:
+        response, waterfall = asyncio.run(run())
+    finally:
+        state.close()
+
+    assert response.status_code == 200
+    lookups = [span for span in waterfall["spans"] if span["name"] == "cache lookup"]
+    assert [span["attributes"]["cache.result"] for span in lookups] == ["hit"]
+    assert lookups[0]["attributes"]["http.route"] == "/repos/{owner}/{repo}"
@@ -0,0 +1,200 @@
+import asyncio
+
+import pytest
+
+from app.schemas.scraper import CodeSnippet
+from app.services import chunker
+from app.services.chunker import chunk_source
+
+# (id, language, source, expected [(symbol_name, symbol_type, start_line, end_line)])
+# Lines outside every declaration come back as "code" chunks unless they are
+# blank, punctuation, comments or bare class/namespace headers
+CASES = [
+    (
+        "python",
+        "Python",
+        "import os\n\n@dec\ndef a(x):\n    return x\n\nclass B:\n    def m(self):\n        pass\n\n"
+        "    async def n(self):\n        pass\n\nclass C:\n    x = 1\n",
+        [(None, "code", 1, 1), ("a", "function", 3, 5), ("B.m", "method", 8, 9), ("B.n", "method", 11, 12),
+         ("C", "class", 14, 15)],
+    ),
+    (
+        "python_form_feed",
+        "Python",
+        "def a():\n    return 1\n\x0c\ndef b():\n    return 2\n",
+        [("a", "function", 1, 2), ("b", "function", 4, 5)],
+    ),
+    (
+        "python_class_body_and_module_code",
+        "Python",
+        "from dataclasses import dataclass\n\n\n@dataclass\nclass Point:\n    x: int\n    y: int = 0\n\n"
+        "    def norm(self):\n        return abs(self.x) + abs(self.y)\n\n\n"
+        "if __name__ == \"__main__\":\n    print(Point(1))\n",
+        [(None, "code", 1, 7), ("Point.norm", "method", 9, 10), (None, "code", 13, 14)],
+    ),
+    (
+        "go",
+        "Go",
+        "package main\n\n// Add adds\nfunc Add(a, b int) int {\n    s := \"}\"\n    return a + b\n}\n\n"
+        "type T struct {\n    X int\n}\n\nfunc (t *T) M() {\n    if true { /* { */ }\n}\n",
+        [(None, "code", 1, 1), ("Add", "function", 3, 7), ("T", "class", 9, 11), ("M", "function", 13, 15)],
+    ),
+    (
+        "java",
+        "Java",
+        "package x;\n\npublic class A {\n    private int x = 0;\n\n    /** doc */\n    @Override\n"
+        "    public String toString() {\n        return \"{\" + x;\n    }\n\n    public A(int x) {\n"
+        "        this.x = x;\n    }\n\n    abstract void q();\n}\n",
+        [(None, "code", 1, 4), ("A.toString", "method", 6, 10), ("A.A", "method", 12, 14), (None, "code", 16, 17)],
+    ),
+    (
+        "java_multiline_signature",
+        "Java",
+        "public class Util {\n    static <T> List<T> make(T a,\n                             T b) {\n"
+        "        return List.of(a, b);\n    }\n\n    static int one() {\n        return 1;\n    }\n}\n",
+        [(None, "code", 1, 5), ("Util.one", "method", 7, 9)],
+    ),
+    (
+        "csharp_block_namespace",
+        "C#",
+        "using System;\n\nnamespace App.Services\n{\n    public class Greeter\n    {\n"
+        "        public string Hello(string name)\n        {\n            return $\"Hi {name}\";\n        }\n\n"
+        "        private static int Count() { return 1; }\n    }\n}\n",
+        [(None, "code", 1, 6), ("Greeter.Hello", "method", 7, 10), ("Greeter.Count", "method", 12, 12)],
+    ),
+    (
+        "csharp_file_scoped_namespace",
+        "C#",
+        "namespace App;\n\npublic class Greeter\n{\n    public void Hello()\n    {\n    }\n}\n",
+        [("Greeter.Hello", "method", 5, 7)],
+    ),
+    (
+        "cpp_namespace",
+        "C++",
+        "#include <string>\n\nnamespace ns {\n\nint add(int a, int b) {\n    return a + b;\n}\n\n"
+        "class Box {\npublic:\n    int size() const {\n        return 1;\n    }\n};\n\n}  // namespace ns\n",
+        [(None, "code", 1, 3), ("add", "function", 5, 7), ("Box.size", "method", 11, 13)],
+    ),
+    (
+        "c_extern_block",
+        "C",
+        "extern \"C\" {\n\nint square(int x) {\n    return x * x;\n}\n\n}\n",
+        [("square", "function", 3, 5)],
+    ),
+    (
+        "rust",
+        "Rust",
+        "pub struct S<'a> { x: &'a str }\n\nimpl<'a> Foo for S<'a> {\n    fn f(&self) -> char { '{' }\n"
+        "    pub fn g<'b>(&self, y: &'b str) -> &'b str {\n        y\n    }\n}\n",
+        [("S", "class", 1, 1), ("S.f", "method", 4, 4), ("S.g", "method", 5, 7)],
+    ),
+    (
+        "typescript",
+        "TypeScript",
+        "export class K {\n  private a = 1;\n  constructor(x: number) {\n    this.a = x;\n  }\n"
+        "  async go(): Promise<void> {\n    if (x) { return; }\n  }\n}\n"
+        "export const f = (x: number) => {\n  return `${x}}`;\n};\n",
+        [(None, "code", 1, 2), ("K.constructor", "method", 3, 5), ("K.go", "method", 6, 8), ("f", "function", 10, 12)],
+    ),
+    (
+        "typescript_namespace",
+        "TypeScript",
+        "namespace Util {\n  export function clamp(x: number) {\n    return x;\n  }\n}\n",
+        [("clamp", "function", 2, 4)],
+    ),
+    (
+        "javascript_line_separator_in_string",
+        "JavaScript",
+        "const s = \"a\u2028b\";\nfunction f() {\n  return 1;\n}\nfunction g() {\n  return 2;\n}\n",
+        [(None, "code", 1, 1), ("f", "function", 2, 4), ("g", "function", 5, 7)],
+    ),
+    (
+        "php",
+        "PHP",
+        "<?php\nnamespace App;\n\nclass Repo {\n    # cache\n    public function find($id) {\n"
+        "        return '}';\n    }\n}\n",
+        [("Repo.find", "method", 5, 8)],
+    ),
+    (
+        "shell",
+        "Shell",
+        "#!/bin/sh\n# greet someone\ngreet() {\n  echo \"}\"\n}\n",
+        [("greet", "function", 1, 5)],
+    ),
+    (
+        "ruby",
+        "Ruby",
+        "module M\n  class K\n    # comment\n    def a\n      if x\n        1\n      end\n    end\n\n"
+        "    def b = 2\n    def c; end\n    def d=(v)\n      @d = v\n    end\n  end\nend\n",
+        [("K.a", "method", 3, 8), ("K.b", "method", 10, 10), ("K.c", "method", 11, 11), ("K.d=", "method", 12, 14)],
+    ),
+    (
+        "lua",
+        "Lua",
+        "-- add numbers\nlocal function add(a, b)\n  return a + b\nend\n",
+        [("add", "function", 1, 4)],
+    ),
+    (
+        "unsupported_language",
+        "Markdown",
+        "# Title\n\nText\n",
+        [(None, "file", 1, 3)],
+    ),
+    (
+        "nothing_to_split",
+        "Python",
+        "x = 1\n",
+        [(None, "file", 1, 1)],
+    ),
+    (
+        "python_syntax_error",
+        "Python",
+        "def broken(:\n",
+        [(None, "file", 1, 1)],
+    ),
+    (
+        "python_parser_memory_error",
+        "Python",
+        "-" * 200000 + "1\n",
+        [(None, "file", 1, 1)],
+    ),
+]
+
+
+@pytest.mark.parametrize("language,source,expected", [case[1:] for case in CASES], ids=[case[0] for case in CASES])
+def test_chunk_spans(language, source, expected):
+    chunks = chunk_source(source, language)
+    assert [(c.symbol_name, c.symbol_type, c.start_line, c.end_line) for c in chunks] == expected
+
+
+@pytest.mark.parametrize("language,source", [case[1:3] for case in CASES], ids=[case[0] for case in CASES])
+def test_chunk_content_matches_span(language, source):
+    lines = source.replace("\r\n", "\n").split("\n")
+    for chunk in chunk_source(source, language):
+        expected = "\n".join(lines[chunk.start_line - 1:chunk.end_line])
+        assert chunk.content.rstrip("\n") == expected.rstrip("\n")
+
+
+def test_chunker_error_falls_back_to_whole_file(monkeypatch):
+    def overflow(content, language):
+        raise RecursionError("maximum recursion depth exceeded")
+
+    monkeypatch.setattr(chunker, "chunk_braces", overflow)
+    assert chunk_source("int f() {\n}\n", "C") == [chunker.Chunk("int f() {\n}\n", 1, 2, None, "file")]
+
+
+def test_pool_is_replaced_after_a_worker_dies(monkeypatch):
+    monkeypatch.setattr(chunker, "CHUNKER_PROCESSES", 1)
+    snippets = [CodeSnippet(content="def f():\n    pass\n", file_path="a.py", language="Python", size_bytes=18, lines_count=2)]
+
+    async def run():
+        try:
+            await chunker.chunk_snippets(snippets)
+            for process in list(chunker._executor._processes.values()):
+                process.kill()
+                process.join()
+            return await chunker.chunk_snippets(snippets)
+        finally:
+            chunker.shutdown_chunker()
+
+    assert [(s.symbol_name, s.symbol_type) for s in asyncio.run(run())] == [("f", "function")]
@@ -0,0 +1,139 @@
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app import compression
+from app.compression import CompressionMiddleware, choose_encoding, parse_accept_encoding
+
+ENCODINGS = [
+    "gzip",
+    pytest.param("zstd", marks=pytest.mark.skipif(compression.zstandard is None, reason="zstandard not installed")),
+]
+
+BIG = {"items": [{"id": i, "content": "def f():\n    return 1\n"} for i in range(500)]}
+CHUNKS = [json.dumps({"line": i}).encode() + b"\n" for i in range(200)]
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+
+@app.get("/big")
+def big():
+    return BIG
+
+
+@app.get("/tiny")
+def tiny():
+    return {"ok": True}
+
+
+@app.get("/stream")
+def stream():
+    return StreamingResponse(iter(CHUNKS), media_type="application/x-ndjson+json")
+
+
+@app.get("/encoded")
+def encoded():
+    return Response(gzip.compress(b"x" * 4096), media_type="text/plain", headers={"Content-Encoding": "gzip"})
+
+
+@app.get("/binary")
+def binary():
+    return Response(b"\x89PNG" + b"\0" * 4096, media_type="image/png")
+
+
+client = TestClient(app)
+
+
+def get_raw(path: str, accept: str):
+    """Response and its body exactly as sent on the wire (not decoded by httpx)"""
+    with client.stream("GET", path, headers={"Accept-Encoding": accept}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def decode(body: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    # Streamed frames do not record their size, so decode incrementally
+    return compression.zstandard.ZstdDecompressor().decompressobj().decompress(body)
+
+
+@pytest.mark.parametrize("header,expected", [
+    ("gzip", {"gzip": 1.0}),
+    ("gzip;q=0.5, zstd", {"gzip": 0.5, "zstd": 1.0}),
+    ("GZIP ; q=0.3,,br;q=oops", {"gzip": 0.3, "br": 0.0}),
+    ("*;q=0.1, identity", {"*": 0.1, "identity": 1.0}),
+])
+def test_parse_accept_encoding(header, expected):
+    assert parse_accept_encoding(header) == expected
+
+
+@pytest.mark.parametrize("header,expected", [
+    ("gzip, zstd", "zstd"),
+    ("gzip;q=1, zstd;q=0.5", "gzip"),
+    ("zstd;q=0, gzip", "gzip"),
+    ("*", "zstd"),
+    ("*;q=0.2, zstd;q=0", "gzip"),
+    ("gzip;q=0", None),
+    ("br, identity", None),
+])
+def test_choose_encoding(header, expected, monkeypatch):
+    # Negotiation only checks that zstandard is importable
+    monkeypatch.setattr(compression, "zstandard", object())
+    assert choose_encoding(header) == expected
+
+
+def test_choose_encoding_without_zstandard(monkeypatch):
+    monkeypatch.setattr(compression, "zstandard", None)
+    assert choose_encoding("zstd, gzip;q=0.1") == "gzip"
+    assert choose_encoding("zstd") is None
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_single_message_body_is_compressed(encoding):
+    response, body = get_raw("/big", encoding)
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(body)
+    assert json.loads(decode(body, encoding)) == BIG
+
+
+def test_large_body_is_compressed_in_a_thread(monkeypatch):
+    monkeypatch.setattr(compression, "THREAD_THRESHOLD", 0)
+    response, body = get_raw("/big", "gzip")
+    assert int(response.headers["content-length"]) == len(body)
+    assert json.loads(gzip.decompress(body)) == BIG
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_streaming_body_is_compressed_chunk_by_chunk(encoding):
+    response, body = get_raw("/stream", encoding)
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert "content-length" not in response.headers
+    assert decode(body, encoding) == b"".join(CHUNKS)
+
+
+@pytest.mark.parametrize("path", ["/tiny", "/binary"])
+def test_small_or_binary_bodies_pass_through(path):
+    plain = client.get(path, headers={"Accept-Encoding": "identity"})
+    response, body = get_raw(path, "gzip, zstd")
+    assert "content-encoding" not in response.headers
+    assert body == plain.content
+    assert int(response.headers["content-length"]) == len(body)
+
+
+def test_already_encoded_body_is_not_compressed_again():
+    response, body = get_raw("/encoded", "gzip, zstd")
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(body) == b"x" * 4096
+
+
+def test_no_accept_encoding_means_identity():
+    response, body = get_raw("/big", "")
+    assert "content-encoding" not in response.headers
+    assert json.loads(body) == BIG
@@ -0,0 +1,146 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.schemas.export import ExportFormat, ExportJob, ExportRequest, ExportStatus
+from app.schemas.scraper import CodeSnippet, RepositoryInfo, ScrapingMode, ScrapingRequest, ScrapingResponse
+from app.services import export_service
+from app.services.export_service import ExportService
+
+
+@pytest.fixture(autouse=True)
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_service, "EXPORT_DIR", str(tmp_path))
+    return tmp_path
+
+
+def scrape_result(full_name: str, languages) -> ScrapingResponse:
+    return ScrapingResponse(
+        repository=RepositoryInfo(
+            name=full_name.split("/")[1], full_name=full_name, stars=0, forks=0,
+            created_at="2020-01-01T00:00:00Z", updated_at="2020-01-01T00:00:00Z",
+        ),
+        mode=ScrapingMode.FILES,
+        code_snippets=[
+            CodeSnippet(content="x = 1\n", file_path=f"f{i}", language=language, size_bytes=6, lines_count=1)
+            for i, language in enumerate(languages)
+        ],
+        total_found=len(languages),
+        returned_count=len(languages),
+    )
+
+
+def run_export(monkeypatch, results, fmt=ExportFormat.PARQUET) -> ExportJob:
+    responses = iter(results)
+
+    async def scrape_repository(request):
+        return next(responses)
+
+    monkeypatch.setattr(export_service.GitHubScraperService, "scrape_repository", scrape_repository)
+    request = ExportRequest(
+        requests=[ScrapingRequest(repo_url="https://github.com/o/r", mode="files")] * len(results), format=fmt
+    )
+
+    async def run():
+        job = await ExportService.create_export(request)
+        await export_service._tasks[job.id]
+        return await ExportService.get_export(job.id)
+
+    return asyncio.run(run())
+
+
+def test_requests_of_a_repository_share_partition_files(monkeypatch, export_dir):
+    pq = pytest.importorskip("pyarrow.parquet")
+    ds = pytest.importorskip("pyarrow.dataset")
+    monkeypatch.setattr(export_service, "EXPORT_ROW_GROUP_ROWS", 4)
+    results = [scrape_result("o/r", ["Python", "Python", "Python", None])] * 3 + [scrape_result("o/s", ["Go"])]
+
+    job = run_export(monkeypatch, results)
+
+    assert job.status == ExportStatus.COMPLETED
+    assert job.rows == 13
+    assert sorted((f.path, f.rows) for f in job.files) == [
+        ("repo=o%2Fr/language=Python/part-00000.parquet", 9),
+        ("repo=o%2Fr/language=__HIVE_DEFAULT_PARTITION__/part-00000.parquet", 3),
+        ("repo=o%2Fs/language=Go/part-00000.parquet", 1),
+    ]
+    python = pq.ParquetFile(export_dir / job.id / "repo=o%2Fr/language=Python/part-00000.parquet")
+    assert [python.metadata.row_group(i).num_rows for i in range(python.num_row_groups)] == [4, 4, 1]
+
+    dataset = ds.dataset(
+        [str(export_dir / job.id / f.path) for f in job.files], format="parquet",
+        partitioning="hive", partition_base_dir=str(export_dir / job.id),
+    )
+    assert dataset.to_table(columns=["repo", "file_path"]).num_rows == 13
+
+
+def test_partition_files_roll_over_and_stay_bounded(monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(export_service, "EXPORT_ROW_GROUP_ROWS", 2)
+    monkeypatch.setattr(export_service, "EXPORT_FILE_MAX_ROWS", 4)
+    monkeypatch.setattr(export_service, "EXPORT_MAX_OPEN_FILES", 1)
+    results = [scrape_result("o/r", ["Python"] * 5), scrape_result("o/r", ["Go"]), scrape_result("o/r", ["Python"])]
+
+    job = run_export(monkeypatch, results, ExportFormat.ARROW)
+
+    assert [(f.path, f.rows) for f in job.files] == [
+        ("repo=o%2Fr/language=Python/part-00000.arrow", 4),
+        ("repo=o%2Fr/language=Python/part-00001.arrow", 1),
+        ("repo=o%2Fr/language=Go/part-00000.arrow", 1),
+        ("repo=o%2Fr/language=Python/part-00002.arrow", 1),
+    ]
+
+
+def dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def orphan(worker: str, heartbeat_age: float = 0) -> ExportJob:
+    job = ExportJob(
+        id="a" * 32,
+        status=ExportStatus.RUNNING,
+        format=ExportFormat.PARQUET,
+        created_at="2026-01-01T00:00:00+00:00",
+        requests_total=3,
+        worker=worker,
+    )
+    export_service._save_status(job)
+    export_service._touch_heartbeat(job.id)
+    beat = time.time() - heartbeat_age
+    os.utime(os.path.join(export_service.job_dir(job.id), export_service.HEARTBEAT_FILE), (beat, beat))
+    return job
+
+
+def test_job_of_dead_worker_is_failed_and_deletable(export_dir):
+    job = orphan(f"{export_service._HOSTNAME}:{dead_pid()}")
+
+    status = asyncio.run(ExportService.get_export(job.id))
+    assert status.status == ExportStatus.FAILED
+    assert "stopped" in status.error
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(ExportService.get_archive(job.id))
+    assert e.value.status_code == 409
+
+    asyncio.run(ExportService.delete_export(job.id))
+    assert not os.path.exists(export_service.job_dir(job.id))
+
+
+def test_job_without_recent_heartbeat_is_failed():
+    interval = export_service.EXPORT_HEARTBEAT_INTERVAL
+    job = orphan("other-host:1", heartbeat_age=interval * (export_service._STALE_HEARTBEATS + 1))
+    assert asyncio.run(ExportService.get_export(job.id)).status == ExportStatus.FAILED
+
+
+def test_job_of_live_worker_elsewhere_is_still_running():
+    job = orphan(f"{export_service._HOSTNAME}:{os.getpid()}")
+    assert asyncio.run(ExportService.get_export(job.id)).status == ExportStatus.RUNNING
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(ExportService.delete_export(job.id))
+    assert e.value.status_code == 409
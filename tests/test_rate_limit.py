@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+import httpx
+
+from app.services import github_client
+from app.services.github_client import CachingTransport, RateLimitTransport, rate_limit_bucket, token_label
+from app.services.resilience import ResilientTransport
+from app.services.shared_state import SharedState
+
+URL = f"{github_client.GITHUB_API_URL}/repos/octo/repo"
+
+
+def fake_github(limit: int):
+    """Upstream that charges quota like GitHub: 200s cost one call, 304s are free"""
+    quota = {"remaining": limit}
+    reset = int(time.time()) + 3600
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        headers = {"etag": '"v1"', "x-ratelimit-reset": str(reset)}
+        if request.headers.get("if-none-match") == '"v1"':
+            headers["x-ratelimit-remaining"] = str(quota["remaining"])
+            return httpx.Response(304, headers=headers)
+        quota["remaining"] -= 1
+        headers["x-ratelimit-remaining"] = str(quota["remaining"])
+        return httpx.Response(200, headers=headers, json={"name": "repo"})
+
+    return quota, httpx.MockTransport(handler)
+
+
+def test_revalidations_do_not_drain_shared_quota(monkeypatch):
+    # Every lookup after the first is stale and revalidated with If-None-Match
+    monkeypatch.setattr(github_client, "CACHE_TTL", 0)
+    quota, upstream = fake_github(limit=10)
+    state = SharedState(":memory:")
+
+    async def run():
+        transport = CachingTransport(
+            ResilientTransport(RateLimitTransport(upstream, state), route_of=github_client.route_template), state
+        )
+        async with httpx.AsyncClient(transport=transport) as client:
+            statuses = [(await client.get(URL)).status_code for _ in range(15)]
+        bucket = rate_limit_bucket(httpx.URL(URL), token_label())
+        ledger = await state._run(
+            lambda: state._connection().execute("SELECT remaining FROM quota WHERE bucket = ?", (bucket,)).fetchone()[0]
+        )
+        return statuses, ledger
+
+    try:
+        statuses, ledger = asyncio.run(run())
+    finally:
+        state.close()
+
+    assert statuses == [200] * 15
+    assert quota["remaining"] == 9
+    assert ledger == 9
@@ -0,0 +1,89 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.config import GITHUB_API_URL
+from app.services import resilience
+from app.services.github_client import route_template
+from app.services.resilience import ResilientTransport
+
+
+def attempts_until_failure(url: str, error: Exception) -> int:
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url)
+        raise error
+
+    async def run():
+        transport = ResilientTransport(httpx.MockTransport(handler), route_of=route_template)
+        async with httpx.AsyncClient(transport=transport) as client:
+            with pytest.raises(type(error)):
+                await client.get(url)
+
+    asyncio.run(run())
+    return len(calls)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_ATTEMPTS", 3)
+    monkeypatch.setattr(resilience, "RETRY_BACKOFF_BASE", 0)
+    monkeypatch.setattr(resilience, "_breakers", {})
+
+
+def test_timed_out_raw_download_is_not_retried():
+    assert attempts_until_failure("https://raw.example.test/o/r/main/a.py", httpx.ReadTimeout("slow")) == 1
+
+
+def test_raw_connect_errors_are_retried():
+    assert attempts_until_failure("https://raw.example.test/o/r/main/a.py", httpx.ConnectError("refused")) == 3
+
+
+def test_api_timeouts_are_retried():
+    url = f"{GITHUB_API_URL}/repos/octo/repo"
+    assert attempts_until_failure(url, httpx.ReadTimeout("slow")) == 3
+
+
+def test_retries_share_the_callers_timeout():
+    read_timeouts = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        read_timeouts.append(request.extensions["timeout"]["read"])
+        await asyncio.sleep(0.2)
+        raise httpx.ReadTimeout("slow", request=request)
+
+    async def run():
+        transport = ResilientTransport(httpx.MockTransport(handler), route_of=route_template)
+        async with httpx.AsyncClient(transport=transport, timeout=0.3) as client:
+            with pytest.raises(httpx.ReadTimeout):
+                await client.get(f"{GITHUB_API_URL}/repos/octo/repo")
+
+    asyncio.run(run())
+    assert len(read_timeouts) == 2
+    assert read_timeouts[0] == 0.3 and read_timeouts[1] < 0.15
+
+
+def statuses_until_done(headers) -> list:
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url)
+        return httpx.Response(503, headers=headers)
+
+    async def run():
+        transport = ResilientTransport(httpx.MockTransport(handler), route_of=route_template)
+        async with httpx.AsyncClient(transport=transport) as client:
+            return (await client.get(f"{GITHUB_API_URL}/repos/octo/repo")).status_code
+
+    return [asyncio.run(run()), len(calls)]
+
+
+def test_short_retry_after_is_honoured():
+    assert statuses_until_done({"Retry-After": "0"}) == [503, 3]
+
+
+def test_retry_after_beyond_the_backoff_cap_is_not_retried():
+    assert statuses_until_done({"Retry-After": "60"}) == [503, 1]
+    assert statuses_until_done({"Retry-After": "Wed, 21 Oct 2099 07:28:00 GMT"}) == [503, 1]
@@ -0,0 +1,46 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.responses import PydanticJSONResponse
+from app.schemas.scraper import CodeSnippet, RepositoryInfo, ScrapingMode, ScrapingResponse
+
+RESPONSE = ScrapingResponse(
+    repository=RepositoryInfo(
+        name="repo", full_name="octo/repo", description="Ünïcode ✓ \"quoted\"", stars=3, forks=1,
+        created_at="2020-01-01T00:00:00Z", updated_at="2021-01-01T00:00:00Z",
+    ),
+    mode=ScrapingMode.FILES,
+    time_window={"start_year": 2020, "end_year": None},
+    code_snippets=[
+        CodeSnippet(
+            content="def f():\n    return '\\u2028'\n", file_path="a.py", language="Python",
+            size_bytes=29, lines_count=2, start_line=1, end_line=2, symbol_name="f", symbol_type="function",
+        ),
+        CodeSnippet(content="x = 1\n", file_path="b.py", size_bytes=6, lines_count=1),
+    ],
+    total_found=2,
+    returned_count=2,
+)
+
+app = FastAPI()
+
+
+@app.get("/model", response_model=ScrapingResponse)
+def through_response_model():
+    return RESPONSE
+
+
+@app.get("/direct", response_model=ScrapingResponse)
+def direct():
+    return PydanticJSONResponse(RESPONSE)
+
+
+client = TestClient(app)
+
+
+def test_matches_response_model_output():
+    expected = client.get("/model")
+    actual = client.get("/direct")
+    assert actual.headers["content-type"] == expected.headers["content-type"]
+    assert actual.content == expected.content
+
@@ -0,0 +1,136 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.observability import tracing
+from app.observability.tracing import STATUS_ERROR, STATUS_OK, trace_request
+from app.services.github_client import InstrumentedTransport
+
+URL = "https://api.github.com/repos/octo/repo"
+BODY = b'{"name": "repo"}' * 10
+
+
+@pytest.fixture(autouse=True)
+def no_export(monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_EXPORT_FILE", None)
+    monkeypatch.setattr(tracing, "OTLP_TRACES_ENDPOINT", None)
+
+
+class NetworkStream(httpx.AsyncByteStream):
+    """Unread body in chunks, like the stream AsyncHTTPTransport returns"""
+
+    async def __aiter__(self):
+        for start in range(0, len(BODY), 64):
+            yield BODY[start:start + 64]
+
+
+async def upstream(request: httpx.Request) -> httpx.Response:
+    """Answers like httpcore would, reporting connection phases to the trace hook"""
+    hook = request.extensions.get("trace")
+    if hook is not None:
+        for event in ("connection.connect_tcp", "connection.start_tls", "http11.receive_response_headers"):
+            await hook(f"{event}.started", {})
+            await hook(f"{event}.complete", {})
+        await hook("http11.receive_response_body.started", {})
+        await hook("http11.receive_response_body.failed", {})
+        await hook("unrelated.event.started", {})
+    status = 503 if request.url.path.endswith("/down") else 200
+    return httpx.Response(status, stream=NetworkStream())
+
+
+def call(url: str, profile: bool = True):
+    seen = {}
+
+    async def run():
+        transport = InstrumentedTransport(httpx.MockTransport(upstream))
+        async with httpx.AsyncClient(transport=transport) as client:
+            async with trace_request("scrape_repository", profile=profile) as trace:
+                response = await client.get(url)
+                seen["hooked"] = "trace" in response.request.extensions
+        await asyncio.gather(*tracing._pending_exports)
+        return trace
+
+    return asyncio.run(run()), seen["hooked"]
+
+
+def spans_by_name(trace) -> dict:
+    return {span.name: span for span in trace.spans}
+
+
+def test_tracing_is_a_no_op_when_off():
+    trace, hooked = call(URL, profile=False)
+    assert trace is None
+    assert not hooked
+    assert tracing.current_trace() is None
+
+
+def test_upstream_call_records_a_client_span_with_phases():
+    trace, hooked = call(URL)
+    assert hooked
+    spans = spans_by_name(trace)
+    client = spans["GET /repos/{owner}/{repo}"]
+    assert client.parent_id == trace.root.span_id
+    assert client.kind == tracing.SPAN_KIND_CLIENT
+    assert client.status == STATUS_OK
+    assert client.attributes["http.response.status_code"] == 200
+    assert client.attributes["http.response.body.size"] == len(BODY)
+
+    phases = {span.name: span for span in trace.spans if span.parent_id == client.span_id}
+    assert set(phases) == {"connect", "tls", "wait", "download"}
+    assert phases["download"].status == STATUS_ERROR
+    assert all(phases[name].status == STATUS_OK for name in ("connect", "tls", "wait"))
+    assert all(span.end_ns is not None and span.end_ns >= span.start_ns for span in trace.spans)
+
+    waterfall = trace.waterfall()
+    assert waterfall["upstream_calls"] == 1
+    assert waterfall["upstream_bytes"] == len(BODY)
+
+
+def test_server_errors_and_transport_errors_mark_the_span():
+    trace, _ = call("https://api.github.com/repos/octo/down")
+    client = next(span for span in trace.spans if span.kind == tracing.SPAN_KIND_CLIENT)
+    assert client.attributes["http.response.status_code"] == 503
+    assert client.status == STATUS_ERROR
+
+    def refuse(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    async def run():
+        transport = InstrumentedTransport(httpx.MockTransport(refuse))
+        async with httpx.AsyncClient(transport=transport) as client:
+            async with trace_request("scrape_repository", profile=True) as trace:
+                with pytest.raises(httpx.ConnectError):
+                    await client.get(URL)
+        return trace
+
+    trace = asyncio.run(run())
+    client = next(span for span in trace.spans if span.kind == tracing.SPAN_KIND_CLIENT)
+    assert client.status == STATUS_ERROR
+    assert client.attributes["error.type"] == "ConnectError"
+
+
+def test_exported_otlp_line_links_spans(tmp_path, monkeypatch):
+    export_file = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "TRACE_EXPORT_FILE", str(export_file))
+
+    trace, hooked = call(URL, profile=False)
+    assert hooked  # exporting alone turns tracing on
+
+    [line] = export_file.read_text().splitlines()
+    [resource] = json.loads(line)["resourceSpans"]
+    assert {"key": "service.name", "value": {"stringValue": "code-scraping"}} in resource["resource"]["attributes"]
+    spans = {span["name"]: span for span in resource["scopeSpans"][0]["spans"]}
+
+    assert {span["traceId"] for span in spans.values()} == {trace.trace_id}
+    root = spans["scrape_repository"]
+    client = spans["GET /repos/{owner}/{repo}"]
+    assert "parentSpanId" not in root
+    assert client["parentSpanId"] == root["spanId"]
+    assert spans["connect"]["parentSpanId"] == client["spanId"]
+    assert int(client["endTimeUnixNano"]) >= int(client["startTimeUnixNano"])
+    attributes = {a["key"]: a["value"] for a in client["attributes"]}
+    assert attributes["http.response.status_code"] == {"intValue": "200"}
+    assert attributes["http.route"] == {"stringValue": "/repos/{owner}/{repo}"}
+    assert client["status"] == {"code": STATUS_OK}